@@ -50,10 +50,48 @@ class Settings(BaseSettings):
     google_sheets_credentials_file: str = "credentials.json"
     google_sheets_credentials_base64: str = ""  # Альтернатива файлу — base64 encoded JSON
     google_sheets_spreadsheet_id: str = ""
+    sheets_flush_seconds: float = 10.0  # как часто записывать журнал в таблицу
+    sheets_flush_batch_size: int = 500  # ячеек за одну запись
+    sheets_max_backoff_seconds: float = 600.0  # предельная пауза между попытками при сбоях
+    sheets_mirror_refresh_seconds: float = 3600.0  # как часто перечитывать лист в зеркало
+    sheets_requests_per_minute: int = 60  # квота Sheets API на пользователя
+    sheets_burst: int = 10  # сколько запросов можно отправить подряд
+    sheets_api_retries: int = 5  # повторов запроса после 429/5xx и сетевых ошибок
+    sheets_api_backoff_seconds: float = 1.0  # задержка перед первым повтором, дальше удваивается
+    sheets_api_max_backoff_seconds: float = 64.0
+    google_sheets_fake: bool = False  # лист в памяти вместо Google (для запуска без доступа)
 
     # Timing (фиксированное)
     notification_time: str = "11:00"  # Утренние уведомления
     reminder_time: str = "18:00"  # Напоминания о неотвеченных
+    maintenance_time: str = "04:00"  # Архивация уведомлений и обслуживание БД
+
+    # Выравнивание нагрузки: сдвигать проверки в пределах schedule_tolerance_days растения
+    schedule_leveling: bool = True
+
+    # Планировщик: опоздание, с которым запуск ещё выполняется, и глубина догоняния при старте
+    job_misfire_grace_seconds: int = 3600
+    job_catch_up_days: int = 7
+
+    # Сколько дней хранить закрытые уведомления до переноса в архив
+    notifications_retention_days: int = 90
+
+    # Режим дайджеста: одно сводное сообщение в день вместо сообщения на каждое растение
+    notification_digest: bool = False
+
+    # Лимиты отправки в Telegram: ~30 сообщений в секунду на бота, ~1 в секунду в один чат
+    telegram_send_concurrency: int = 8  # запросов к API одновременно
+    telegram_global_rate: float = 30.0  # сообщений в секунду на бота
+    telegram_chat_rate: float = 1.0  # сообщений в секунду в один чат
+    telegram_chat_burst: int = 1  # сколько сообщений в чат можно отправить подряд
+    telegram_send_retries: int = 3  # повторов после TelegramRetryAfter
+
+    # Очередь исходящих сообщений
+    outbox_batch_size: int = 50  # сообщений за один проход
+    outbox_poll_seconds: float = 30.0  # как часто проверять очередь без новых сообщений
+    outbox_max_attempts: int = 5  # попыток до статуса FAILED
+    outbox_backoff_seconds: float = 5.0  # задержка перед первым повтором, дальше удваивается
+    outbox_max_backoff_seconds: float = 600.0
 
     # Timezone
     timezone: str = "Europe/Moscow"
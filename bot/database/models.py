@@ -31,6 +31,21 @@ class NotificationType(str, Enum):
     WATER = "water"  # просьба полить
 
 
+class OutboxStatus(str, Enum):
+    """Статус сообщения в очереди отправки."""
+
+    PENDING = "pending"  # ждёт отправки (или повтора)
+    SENT = "sent"  # отправлено
+    FAILED = "failed"  # попытки исчерпаны
+
+
+class SheetsColor(str, Enum):
+    """Цвет ячейки в Google Sheets."""
+
+    YELLOW = "yellow"  # уведомление отправлено
+    GREEN = "green"  # ответ получен
+
+
 class WateringPreference(str, Enum):
     """Предпочтение: пересушить или перелить."""
 
@@ -38,7 +53,7 @@ class WateringPreference(str, Enum):
     OVERWATER = "overwater"  # лучше недополить
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Plant:
     """Профиль растения (из JSON)."""
 
@@ -50,9 +65,11 @@ class Plant:
     moist_interval_days: int  # через сколько дней проверять, если слегка влажная
     preference: WateringPreference
     notes: Optional[str] = None
+    # На сколько дней можно сдвинуть проверку, чтобы разгрузить пиковые дни (0 — не сдвигать)
+    schedule_tolerance_days: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class PlantStatus:
     """Текущий статус растения (в БД)."""
 
@@ -61,14 +78,10 @@ class PlantStatus:
     last_check_date: date
     next_check_date: date
     overdue_days: int = 0  # дней игнора просьбы полить
-    updated_at: datetime = None
+    updated_at: Optional[datetime] = None  # None — проставится при записи в БД
 
-    def __post_init__(self):
-        if self.updated_at is None:
-            self.updated_at = datetime.now()
 
-
-@dataclass
+@dataclass(slots=True)
 class Notification:
     """Уведомление (в БД)."""
 
@@ -82,18 +95,53 @@ class Notification:
     answer: Optional[str] = None  # ответ пользователя
 
 
-@dataclass
+@dataclass(slots=True)
 class UserSettings:
     """Настройки пользователя."""
 
     user_id: int
     notification_time: str = "09:00"
-    created_at: datetime = None
-    updated_at: datetime = None
-
-    def __post_init__(self):
-        now = datetime.now()
-        if self.created_at is None:
-            self.created_at = now
-        if self.updated_at is None:
-            self.updated_at = now
+    # None — проставятся при записи в БД
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class OutboxMessage:
+    """Исходящее сообщение в очереди отправки (в БД)."""
+
+    id: Optional[int]
+    idempotency_key: str  # одно сообщение на ключ, повторная постановка игнорируется
+    chat_id: int
+    text: str
+    reply_markup: Optional[str] = None  # JSON клавиатуры
+    notification_id: Optional[int] = None  # уведомление, которому записать message_id
+    status: OutboxStatus = OutboxStatus.PENDING
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None  # None — сразу
+    created_at: Optional[datetime] = None  # None — проставится при записи в БД
+    sent_at: Optional[datetime] = None
+    message_id: Optional[int] = None
+    last_error: Optional[str] = None
+    priority: int = 0  # меньше — раньше отправка
+
+
+@dataclass(slots=True)
+class Digest:
+    """Сводное сообщение за день (в БД)."""
+
+    day: date
+    chat_id: int
+    message_id: Optional[int] = None  # None — ещё не отправлено
+
+
+@dataclass(slots=True)
+class SheetsCell:
+    """Отложенная запись ячейки Google Sheets (журнал в БД, одна запись на ячейку)."""
+
+    plant_name: str
+    day: date
+    value: str
+    color: Optional[SheetsColor] = None
+    if_empty: bool = False  # записать, только если ячейка в таблице пустая
+    version: int = 1  # растёт при каждом изменении записи
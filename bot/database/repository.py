@@ -1,18 +1,262 @@
 """Репозиторий для работы с базой данных."""
 
-import aiosqlite
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import date, datetime
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional
+
+import aiosqlite
 
 from bot.config import settings
 from bot.database.models import (
+    Digest,
     Notification,
     NotificationStatus,
     NotificationType,
+    OutboxMessage,
+    OutboxStatus,
     PlantStatus,
-    SoilMoisture,
+    SheetsCell,
     UserSettings,
 )
+from bot.database.schema import (
+    ENUM_CODES,
+    ENUM_CODES_TABLE,
+    MIGRATION_V1,
+    MIGRATION_V2,
+    MIGRATION_V3,
+    MIGRATION_V4,
+    MIGRATION_V5,
+    MIGRATION_V6,
+    MIGRATION_V7,
+    MIGRATION_V8,
+    MIGRATION_V9,
+    MIGRATION_V10,
+    MOISTURE_CODES,
+    NOTIFICATION_COLUMNS,
+    NOTIFICATION_STATUS_CODES,
+    NOTIFICATION_TYPE_CODES,
+    OUTBOX_STATUS_CODES,
+    SCHEMA,
+    SCHEMA_VERSION,
+    SHEETS_COLOR_CODES,
+)
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA, применяемые к постоянному соединению:
+# WAL позволяет читать во время записи и делает коммит дешевле (без перезаписи журнала),
+# synchronous=NORMAL в WAL-режиме безопасен при падении процесса,
+# отрицательный cache_size — размер кэша страниц в KiB.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Размер кэша подготовленных выражений sqlite3 (по одному на текст запроса)
+_STATEMENT_CACHE_SIZE = 64
+
+# Значение PRAGMA auto_vacuum для режима INCREMENTAL
+_AUTO_VACUUM_INCREMENTAL = 2
+
+# Коды перечислений <-> значения (см. bot.database.schema)
+_MOISTURE_TO_CODE = {value: code for code, value in enumerate(MOISTURE_CODES)}
+_TYPE_TO_CODE = {value: code for code, value in enumerate(NOTIFICATION_TYPE_CODES)}
+_STATUS_TO_CODE = {value: code for code, value in enumerate(NOTIFICATION_STATUS_CODES)}
+_OUTBOX_STATUS_TO_CODE = {value: code for code, value in enumerate(OUTBOX_STATUS_CODES)}
+_SHEETS_COLOR_TO_CODE = {value: code for code, value in enumerate(SHEETS_COLOR_CODES)}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Признак того, что текущая задача выполняется внутри Database.transaction()
+_in_transaction: ContextVar[bool] = ContextVar("_in_transaction", default=False)
+
+
+async def _get_user_version(conn: aiosqlite.Connection) -> int:
+    """Прочитать версию схемы."""
+    async with conn.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+        return row[0]
+
+
+def _to_day(d: date) -> int:
+    """Дата -> номер дня от 1970-01-01."""
+    return d.toordinal() - _EPOCH_ORDINAL
+
+
+def _from_day(day: int) -> date:
+    """Номер дня от 1970-01-01 -> дата."""
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def _to_ts(dt: datetime) -> int:
+    """Локальное время -> unix time в секундах."""
+    return int(dt.timestamp())
+
+
+def _from_ts(ts: int) -> datetime:
+    """Unix time в секундах -> локальное время."""
+    return datetime.fromtimestamp(ts)
+
+
+# Явные списки столбцов: порядок в кортеже строки совпадает с порядком в декодере
+_PLANT_STATUS_SELECT = (
+    "SELECT plant_id, last_moisture, last_check_day, next_check_day, overdue_days, updated_at "
+    "FROM plant_status"
+)
+_NOTIFICATION_SELECT = (
+    "SELECT id, plant_id, notification_type, status, message_id, created_at, answered_at, answer "
+    "FROM notifications"
+)
+_OUTBOX_SELECT = (
+    "SELECT id, idempotency_key, chat_id, text, reply_markup, notification_id, status, "
+    "attempts, next_attempt_at, created_at, sent_at, message_id, last_error, priority "
+    "FROM outbox"
+)
+_USER_SETTINGS_SELECT = (
+    "SELECT user_id, notification_time, created_at, updated_at FROM user_settings"
+)
+
+
+def _decode_plant_status(row: tuple) -> PlantStatus:
+    """Строка plant_status -> PlantStatus."""
+    plant_id, moisture, last_check_day, next_check_day, overdue_days, updated_at = row
+    return PlantStatus(
+        plant_id=plant_id,
+        last_moisture=MOISTURE_CODES[moisture],
+        last_check_date=_from_day(last_check_day),
+        next_check_date=_from_day(next_check_day),
+        overdue_days=overdue_days,
+        updated_at=_from_ts(updated_at),
+    )
+
+
+def _decode_notification(row: tuple) -> Notification:
+    """Строка notifications -> Notification."""
+    (
+        notification_id,
+        plant_id,
+        notification_type,
+        status,
+        message_id,
+        created_at,
+        answered_at,
+        answer,
+    ) = row
+    return Notification(
+        id=notification_id,
+        plant_id=plant_id,
+        notification_type=NOTIFICATION_TYPE_CODES[notification_type],
+        status=NOTIFICATION_STATUS_CODES[status],
+        message_id=message_id,
+        created_at=_from_ts(created_at),
+        answered_at=_from_ts(answered_at) if answered_at is not None else None,
+        answer=answer,
+    )
+
+
+def _decode_outbox_message(row: tuple) -> OutboxMessage:
+    """Строка outbox -> OutboxMessage."""
+    (
+        outbox_id,
+        idempotency_key,
+        chat_id,
+        text,
+        reply_markup,
+        notification_id,
+        status,
+        attempts,
+        next_attempt_at,
+        created_at,
+        sent_at,
+        message_id,
+        last_error,
+        priority,
+    ) = row
+    return OutboxMessage(
+        id=outbox_id,
+        idempotency_key=idempotency_key,
+        chat_id=chat_id,
+        text=text,
+        reply_markup=reply_markup,
+        notification_id=notification_id,
+        status=OUTBOX_STATUS_CODES[status],
+        attempts=attempts,
+        next_attempt_at=_from_ts(next_attempt_at),
+        created_at=_from_ts(created_at),
+        sent_at=_from_ts(sent_at) if sent_at is not None else None,
+        message_id=message_id,
+        last_error=last_error,
+        priority=priority,
+    )
+
+
+def _decode_user_settings(row: tuple) -> UserSettings:
+    """Строка user_settings -> UserSettings."""
+    user_id, notification_time, created_at, updated_at = row
+    return UserSettings(
+        user_id=user_id,
+        notification_time=notification_time,
+        created_at=datetime.fromisoformat(created_at),
+        updated_at=datetime.fromisoformat(updated_at),
+    )
+
+
+def _encode_plant_status(status: PlantStatus) -> tuple:
+    """PlantStatus -> параметры INSERT в порядке столбцов plant_status."""
+    return (
+        status.plant_id,
+        _MOISTURE_TO_CODE[status.last_moisture],
+        _to_day(status.last_check_date),
+        _to_day(status.next_check_date),
+        status.overdue_days,
+        _to_ts(status.updated_at or datetime.now()),
+    )
+
+
+_NOTIFICATION_INSERT = """
+    INSERT INTO notifications
+        (plant_id, notification_type, status, message_id, created_at, created_day)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def _encode_notification(notification: Notification) -> tuple:
+    """Notification -> параметры _NOTIFICATION_INSERT."""
+    return (
+        notification.plant_id,
+        _TYPE_TO_CODE[notification.notification_type],
+        _STATUS_TO_CODE[notification.status],
+        notification.message_id,
+        _to_ts(notification.created_at),
+        _to_day(notification.created_at.date()),
+    )
+
+
+async def _sync_enum_codes(conn: aiosqlite.Connection):
+    """Создать таблицу enum_codes и привести её к ENUM_CODES."""
+    await conn.executescript(ENUM_CODES_TABLE)
+    await conn.executemany(
+        "INSERT OR REPLACE INTO enum_codes (enum, code, value) VALUES (?, ?, ?)",
+        [
+            (enum, code, value.value)
+            for enum, values in ENUM_CODES.items()
+            for code, value in enumerate(values)
+        ],
+    )
+
+
+async def _table_exists(conn: aiosqlite.Connection, name: str) -> bool:
+    """Проверить, существует ли таблица."""
+    async with conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ) as cursor:
+        return await cursor.fetchone() is not None
 
 
 class Database:
@@ -20,157 +264,240 @@ class Database:
 
     def __init__(self, db_path: str = None):
         self.db_path = db_path or str(settings.db_path)
+        self._conn: Optional[aiosqlite.Connection] = None
+        # Соединение одно, поэтому транзакции и одиночные запросы
+        # сериализуются, чтобы чужой запрос не попал в открытую транзакцию
+        self._lock = asyncio.Lock()
+        self._rollback_hooks: list[Callable[[], None]] = []
+
+    @property
+    def conn(self) -> aiosqlite.Connection:
+        """Постоянное соединение с базой (открывается в init)."""
+        if self._conn is None:
+            raise RuntimeError("База данных не инициализирована: вызовите init()")
+        return self._conn
+
+    async def connect(self):
+        """Открыть постоянное соединение и применить PRAGMA."""
+        if self._conn is not None:
+            return
+
+        # isolation_level=None — автокоммит: одиночный запрос фиксируется сразу,
+        # без отдельного вызова commit()
+        self._conn = await aiosqlite.connect(
+            self.db_path,
+            isolation_level=None,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+        )
+        # Строки — обычные кортежи, их разбирают декодеры _decode_*
+        for pragma in _CONNECTION_PRAGMAS:
+            await self._conn.execute(pragma)
+
+    async def close(self):
+        """Закрыть соединение с базой."""
+        if self._conn is None:
+            return
+        async with self._lock:
+            # Сбрасываем WAL в основной файл перед остановкой
+            await self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            await self._conn.close()
+            self._conn = None
+
+    def add_rollback_hook(self, hook: Callable[[], None]):
+        """Зарегистрировать функцию, вызываемую после отката транзакции (сброс кэшей)."""
+        self._rollback_hooks.append(hook)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Единица работы: все запросы внутри блока выполняются в одной транзакции.
+
+        Коммит — один раз при выходе из блока, при исключении — откат.
+        Вложенные вызовы становятся частью внешней транзакции.
+
+        Пример:
+            async with db.transaction():
+                await db.upsert_plant_status(status)
+                await db.update_notification(notification_id, NotificationStatus.ANSWERED)
+        """
+        if _in_transaction.get():
+            yield
+            return
+
+        async with self._lock:
+            # IMMEDIATE сразу берёт блокировку на запись — без апгрейда посреди транзакции
+            await self.conn.execute("BEGIN IMMEDIATE")
+            token = _in_transaction.set(True)
+            try:
+                yield
+                await self.conn.execute("COMMIT")
+            except BaseException:
+                # Сюда попадает и неудачный COMMIT (SQLITE_BUSY, нет места):
+                # без отката соединение осталось бы в открытой транзакции
+                if self.conn.in_transaction:
+                    await self.conn.execute("ROLLBACK")
+                for hook in self._rollback_hooks:
+                    hook()
+                raise
+            finally:
+                _in_transaction.reset(token)
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Соединение для одного метода: внутри транзакции — как есть, иначе под блокировкой."""
+        if _in_transaction.get():
+            yield self.conn
+            return
+
+        async with self._lock:
+            yield self.conn
 
     async def init(self):
         """Инициализация базы данных."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.executescript("""
-                CREATE TABLE IF NOT EXISTS plant_status (
-                    plant_id TEXT PRIMARY KEY,
-                    last_moisture TEXT NOT NULL,
-                    last_check_date TEXT NOT NULL,
-                    next_check_date TEXT NOT NULL,
-                    overdue_days INTEGER DEFAULT 0,
-                    updated_at TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS notifications (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    plant_id TEXT NOT NULL,
-                    notification_type TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    message_id INTEGER,
-                    created_at TEXT NOT NULL,
-                    answered_at TEXT,
-                    answer TEXT
-                );
-
-                CREATE TABLE IF NOT EXISTS user_settings (
-                    user_id INTEGER PRIMARY KEY,
-                    notification_time TEXT NOT NULL DEFAULT '09:00',
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_notifications_status 
-                ON notifications(status);
-                
-                CREATE INDEX IF NOT EXISTS idx_notifications_date 
-                ON notifications(created_at);
-            """)
-            await db.commit()
+        await self.connect()
+        async with self._session() as conn:
+            await _sync_enum_codes(conn)
+
+            version = await _get_user_version(conn)
+            if version == 0 and not await _table_exists(conn, "notifications"):
+                # Новая база — сразу актуальная схема
+                await conn.executescript(SCHEMA)
+                await conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            else:
+                await self._migrate(conn, version)
+
+            # Режим auto_vacuum нельзя сменить у уже размеченного файла (а WAL размечает
+            # его при подключении), поэтому включаем его один раз через VACUUM
+            async with conn.execute("PRAGMA auto_vacuum") as cursor:
+                auto_vacuum = (await cursor.fetchone())[0]
+            if auto_vacuum != _AUTO_VACUUM_INCREMENTAL:
+                logger.info("Включение incremental auto_vacuum")
+                await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                await conn.execute("VACUUM")
+
+    async def _migrate(self, conn: aiosqlite.Connection, version: int):
+        """Довести схему существующей базы до SCHEMA_VERSION."""
+        if version < 1:
+            logger.info("Миграция БД: хранимая дата уведомления и индексы")
+            await conn.executescript(MIGRATION_V1)
+        if version < 2:
+            logger.info("Миграция БД: архив уведомлений")
+            await conn.executescript(MIGRATION_V2)
+        if version < 3:
+            logger.info("Миграция БД: компактный формат статусов и уведомлений")
+            await conn.executescript(MIGRATION_V3)
+            # Старые таблицы удалены — возвращаем место файлу
+            await conn.execute("VACUUM")
+        if version < 4:
+            logger.info("Миграция БД: очередь исходящих сообщений")
+            await conn.executescript(MIGRATION_V4)
+            # До очереди все уведомления отправлялись активному поливальщику
+            await conn.execute(
+                "UPDATE notifications SET chat_id = ? WHERE message_id IS NOT NULL",
+                (settings.active_waterer_id,),
+            )
+            await conn.commit()
+        if version < 5:
+            logger.info("Миграция БД: сводные сообщения")
+            await conn.executescript(MIGRATION_V5)
+        if version < 6:
+            logger.info("Миграция БД: журнал запусков задач")
+            await conn.executescript(MIGRATION_V6)
+        if version < 7:
+            logger.info("Миграция БД: журнал ежедневных рассылок")
+            await conn.executescript(MIGRATION_V7)
+        if version < 8:
+            logger.info("Миграция БД: приоритет сообщений в очереди")
+            await conn.executescript(MIGRATION_V8)
+        if version < 9:
+            logger.info("Миграция БД: журнал записи в Google Sheets")
+            await conn.executescript(MIGRATION_V9)
+        if version < 10:
+            logger.info("Миграция БД: индекс уведомлений по дню")
+            await conn.executescript(MIGRATION_V10)
 
     # Plant Status methods
     async def get_plant_status(self, plant_id: str) -> Optional[PlantStatus]:
         """Получить статус растения."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM plant_status WHERE plant_id = ?", (plant_id,)
+        async with self._session() as conn:
+            async with conn.execute(
+                f"{_PLANT_STATUS_SELECT} WHERE plant_id = ?", (plant_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return PlantStatus(
-                        plant_id=row["plant_id"],
-                        last_moisture=SoilMoisture(row["last_moisture"]),
-                        last_check_date=date.fromisoformat(row["last_check_date"]),
-                        next_check_date=date.fromisoformat(row["next_check_date"]),
-                        overdue_days=row["overdue_days"],
-                        updated_at=datetime.fromisoformat(row["updated_at"]),
-                    )
+                    return _decode_plant_status(row)
         return None
 
     async def get_all_plant_statuses(self) -> list[PlantStatus]:
         """Получить статусы всех растений."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM plant_status") as cursor:
-                rows = await cursor.fetchall()
-                return [
-                    PlantStatus(
-                        plant_id=row["plant_id"],
-                        last_moisture=SoilMoisture(row["last_moisture"]),
-                        last_check_date=date.fromisoformat(row["last_check_date"]),
-                        next_check_date=date.fromisoformat(row["next_check_date"]),
-                        overdue_days=row["overdue_days"],
-                        updated_at=datetime.fromisoformat(row["updated_at"]),
-                    )
-                    for row in rows
-                ]
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(_PLANT_STATUS_SELECT)
+            return list(map(_decode_plant_status, rows))
+
+    async def insert_plant_statuses(self, statuses: list[PlantStatus]):
+        """Создать статусы пачкой (существующие не перезаписываются)."""
+        if not statuses:
+            return
+
+        async with self.transaction():
+            await self.conn.executemany(
+                """
+                INSERT INTO plant_status
+                    (plant_id, last_moisture, last_check_day, next_check_day,
+                     overdue_days, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(plant_id) DO NOTHING
+                """,
+                map(_encode_plant_status, statuses),
+            )
 
     async def upsert_plant_status(self, status: PlantStatus):
         """Обновить или создать статус растения."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
+        async with self._session() as conn:
+            await conn.execute(
                 """
-                INSERT INTO plant_status 
-                    (plant_id, last_moisture, last_check_date, next_check_date, overdue_days, updated_at)
+                INSERT INTO plant_status
+                    (plant_id, last_moisture, last_check_day, next_check_day,
+                     overdue_days, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?)
                 ON CONFLICT(plant_id) DO UPDATE SET
                     last_moisture = excluded.last_moisture,
-                    last_check_date = excluded.last_check_date,
-                    next_check_date = excluded.next_check_date,
+                    last_check_day = excluded.last_check_day,
+                    next_check_day = excluded.next_check_day,
                     overdue_days = excluded.overdue_days,
                     updated_at = excluded.updated_at
                 """,
-                (
-                    status.plant_id,
-                    status.last_moisture.value,
-                    status.last_check_date.isoformat(),
-                    status.next_check_date.isoformat(),
-                    status.overdue_days,
-                    status.updated_at.isoformat(),
-                ),
-            )
-            await db.commit()
-
-    async def increment_overdue_days(self, plant_id: str):
-        """Увеличить счётчик дней игнора."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """
-                UPDATE plant_status 
-                SET overdue_days = overdue_days + 1, updated_at = ?
-                WHERE plant_id = ?
-                """,
-                (datetime.now().isoformat(), plant_id),
-            )
-            await db.commit()
-
-    async def reset_overdue_days(self, plant_id: str):
-        """Сбросить счётчик дней игнора."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """
-                UPDATE plant_status 
-                SET overdue_days = 0, updated_at = ?
-                WHERE plant_id = ?
-                """,
-                (datetime.now().isoformat(), plant_id),
+                _encode_plant_status(status),
             )
-            await db.commit()
 
     # Notification methods
     async def create_notification(self, notification: Notification) -> int:
         """Создать уведомление."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                """
-                INSERT INTO notifications 
-                    (plant_id, notification_type, status, message_id, created_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    notification.plant_id,
-                    notification.notification_type.value,
-                    notification.status.value,
-                    notification.message_id,
-                    notification.created_at.isoformat(),
-                ),
-            )
-            await db.commit()
+        async with self._session() as conn:
+            cursor = await conn.execute(_NOTIFICATION_INSERT, _encode_notification(notification))
             return cursor.lastrowid
 
+    async def get_notification(self, notification_id: int) -> Optional[Notification]:
+        """Получить уведомление по ID."""
+        async with self._session() as conn:
+            async with conn.execute(
+                f"{_NOTIFICATION_SELECT} WHERE id = ?", (notification_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        return _decode_notification(row) if row else None
+
+    async def get_notifications(self, notification_ids: list[int]) -> list[Notification]:
+        """Получить уведомления по списку ID одним запросом."""
+        if not notification_ids:
+            return []
+
+        placeholders = ", ".join("?" * len(notification_ids))
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                f"{_NOTIFICATION_SELECT} WHERE id IN ({placeholders})", tuple(notification_ids)
+            )
+            return list(map(_decode_notification, rows))
+
     async def update_notification(
         self,
         notification_id: int,
@@ -178,149 +505,515 @@ class Database:
         answer: str = None,
     ):
         """Обновить статус уведомления."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
+        async with self._session() as conn:
+            await conn.execute(
                 """
-                UPDATE notifications 
+                UPDATE notifications
                 SET status = ?, answered_at = ?, answer = ?
                 WHERE id = ?
                 """,
                 (
-                    status.value,
-                    datetime.now().isoformat() if answer else None,
+                    _STATUS_TO_CODE[status],
+                    _to_ts(datetime.now()) if answer else None,
                     answer,
                     notification_id,
                 ),
             )
-            await db.commit()
 
-    async def update_notification_message_id(self, notification_id: int, message_id: int):
-        """Обновить message_id уведомления."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "UPDATE notifications SET message_id = ? WHERE id = ?",
-                (message_id, notification_id),
+    async def mark_notifications_reminded(self, notification_ids: list[int]) -> int:
+        """
+        Пометить уведомления напомненными одним запросом (только ещё не напомненные).
+
+        Returns:
+            int: сколько уведомлений помечено
+        """
+        if not notification_ids:
+            return 0
+
+        placeholders = ", ".join("?" * len(notification_ids))
+        async with self._session() as conn:
+            cursor = await conn.execute(
+                f"UPDATE notifications SET status = ? WHERE status = ? AND id IN ({placeholders})",
+                (
+                    _STATUS_TO_CODE[NotificationStatus.REMINDED],
+                    _STATUS_TO_CODE[NotificationStatus.PENDING],
+                    *notification_ids,
+                ),
+            )
+            return cursor.rowcount
+
+    async def update_notification_message_id(
+        self, notification_id: int, chat_id: int, message_id: int
+    ):
+        """Записать в уведомление чат и message_id отправленного сообщения."""
+        async with self._session() as conn:
+            await conn.execute(
+                "UPDATE notifications SET chat_id = ?, message_id = ? WHERE id = ?",
+                (chat_id, message_id, notification_id),
             )
-            await db.commit()
 
     async def get_pending_notifications(self, for_date: date = None) -> list[Notification]:
         """Получить неотвеченные уведомления."""
         if for_date is None:
             for_date = date.today()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                """
-                SELECT * FROM notifications 
-                WHERE status IN (?, ?) 
-                AND DATE(created_at) = ?
-                """,
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                f"{_NOTIFICATION_SELECT} WHERE status IN (?, ?) AND created_day = ?",
                 (
-                    NotificationStatus.PENDING.value,
-                    NotificationStatus.REMINDED.value,
-                    for_date.isoformat(),
+                    _STATUS_TO_CODE[NotificationStatus.PENDING],
+                    _STATUS_TO_CODE[NotificationStatus.REMINDED],
+                    _to_day(for_date),
                 ),
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [
-                    Notification(
-                        id=row["id"],
-                        plant_id=row["plant_id"],
-                        notification_type=NotificationType(row["notification_type"]),
-                        status=NotificationStatus(row["status"]),
-                        message_id=row["message_id"],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        answered_at=(
-                            datetime.fromisoformat(row["answered_at"])
-                            if row["answered_at"]
-                            else None
-                        ),
-                        answer=row["answer"],
-                    )
-                    for row in rows
-                ]
-
-    async def get_notification_by_message_id(self, message_id: int) -> Optional[Notification]:
-        """Получить уведомление по message_id."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM notifications WHERE message_id = ?", (message_id,)
+            )
+            return list(map(_decode_notification, rows))
+
+    async def get_notification_by_message_id(
+        self, chat_id: int, message_id: int
+    ) -> Optional[Notification]:
+        """Получить уведомление по сообщению (message_id уникален только в пределах чата)."""
+        async with self._session() as conn:
+            async with conn.execute(
+                f"{_NOTIFICATION_SELECT} WHERE chat_id = ? AND message_id = ?",
+                (chat_id, message_id),
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return Notification(
-                        id=row["id"],
-                        plant_id=row["plant_id"],
-                        notification_type=NotificationType(row["notification_type"]),
-                        status=NotificationStatus(row["status"]),
-                        message_id=row["message_id"],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        answered_at=(
-                            datetime.fromisoformat(row["answered_at"])
-                            if row["answered_at"]
-                            else None
-                        ),
-                        answer=row["answer"],
-                    )
+                    return _decode_notification(row)
         return None
 
+    async def get_notifications_for_day(self, day: date) -> list[Notification]:
+        """Все уведомления, созданные за день, в порядке создания."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                f"{_NOTIFICATION_SELECT} WHERE created_day = ? ORDER BY id",
+                (_to_day(day),),
+            )
+            return list(map(_decode_notification, rows))
+
     async def get_today_notification_for_plant(
         self, plant_id: str, notification_type: NotificationType = None
     ) -> Optional[Notification]:
         """Получить уведомление для растения за сегодня."""
         today = date.today()
-        query = "SELECT * FROM notifications WHERE plant_id = ? AND DATE(created_at) = ?"
-        params = [plant_id, today.isoformat()]
+        query = f"{_NOTIFICATION_SELECT} WHERE plant_id = ? AND created_day = ?"
+        params = [plant_id, _to_day(today)]
 
         if notification_type:
             query += " AND notification_type = ?"
-            params.append(notification_type.value)
+            params.append(_TYPE_TO_CODE[notification_type])
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(query, tuple(params)) as cursor:
+        async with self._session() as conn:
+            async with conn.execute(query, tuple(params)) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return Notification(
-                        id=row["id"],
-                        plant_id=row["plant_id"],
-                        notification_type=NotificationType(row["notification_type"]),
-                        status=NotificationStatus(row["status"]),
-                        message_id=row["message_id"],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        answered_at=(
-                            datetime.fromisoformat(row["answered_at"])
-                            if row["answered_at"]
-                            else None
-                        ),
-                        answer=row["answer"],
-                    )
+                    return _decode_notification(row)
         return None
 
+    async def get_notified_plants(self, day: date) -> set[tuple[str, NotificationType]]:
+        """Все (plant_id, тип), по которым за день уже создано уведомление, одним запросом."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                "SELECT plant_id, notification_type FROM notifications WHERE created_day = ?",
+                (_to_day(day),),
+            )
+        return {(plant_id, NOTIFICATION_TYPE_CODES[code]) for plant_id, code in rows}
+
+    async def reschedule_pending_notifications(
+        self, for_date: date, next_date: date
+    ) -> list[tuple[str, NotificationType]]:
+        """
+        Перенести все неотвеченные уведомления за день несколькими запросами в одной транзакции.
+
+        Уведомления помечаются перенесёнными, у растений с просьбой полить
+        увеличивается счётчик игнора, следующая проверка всех растений — next_date.
+
+        Returns:
+            list[tuple[str, NotificationType]]: (plant_id, тип) перенесённых уведомлений
+        """
+        pending = (
+            _STATUS_TO_CODE[NotificationStatus.PENDING],
+            _STATUS_TO_CODE[NotificationStatus.REMINDED],
+            _to_day(for_date),
+        )
+        now = _to_ts(datetime.now())
+
+        async with self.transaction():
+            rows = await self.conn.execute_fetchall(
+                """
+                SELECT plant_id, notification_type FROM notifications
+                WHERE status IN (?, ?) AND created_day = ?
+                """,
+                pending,
+            )
+            if not rows:
+                return []
+
+            await self.conn.execute(
+                """
+                UPDATE plant_status
+                SET overdue_days = overdue_days + 1, updated_at = ?
+                WHERE plant_id IN (
+                    SELECT plant_id FROM notifications
+                    WHERE status IN (?, ?) AND created_day = ? AND notification_type = ?
+                )
+                """,
+                (now, *pending, _TYPE_TO_CODE[NotificationType.WATER]),
+            )
+            await self.conn.execute(
+                """
+                UPDATE plant_status
+                SET next_check_day = ?, updated_at = ?
+                WHERE plant_id IN (
+                    SELECT plant_id FROM notifications
+                    WHERE status IN (?, ?) AND created_day = ?
+                )
+                """,
+                (_to_day(next_date), now, *pending),
+            )
+            await self.conn.execute(
+                """
+                UPDATE notifications
+                SET status = ?, answered_at = NULL, answer = NULL
+                WHERE status IN (?, ?) AND created_day = ?
+                """,
+                (_STATUS_TO_CODE[NotificationStatus.RESCHEDULED], *pending),
+            )
+
+        return [
+            (plant_id, NOTIFICATION_TYPE_CODES[notification_type])
+            for plant_id, notification_type in rows
+        ]
+
+    # Outbox methods
+    async def enqueue_outbox(self, message: OutboxMessage) -> Optional[int]:
+        """
+        Поставить сообщение в очередь отправки.
+
+        Returns:
+            Optional[int]: id записи или None, если сообщение с таким ключом уже есть
+        """
+        now = datetime.now()
+        async with self._session() as conn:
+            cursor = await conn.execute(
+                """
+                INSERT INTO outbox
+                    (idempotency_key, chat_id, text, reply_markup, notification_id,
+                     status, attempts, next_attempt_at, created_at, priority)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)
+                ON CONFLICT(idempotency_key) DO NOTHING
+                """,
+                (
+                    message.idempotency_key,
+                    message.chat_id,
+                    message.text,
+                    message.reply_markup,
+                    message.notification_id,
+                    _OUTBOX_STATUS_TO_CODE[OutboxStatus.PENDING],
+                    _to_ts(message.next_attempt_at or now),
+                    _to_ts(message.created_at or now),
+                    message.priority,
+                ),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    async def set_outbox_notification(self, outbox_id: int, notification_id: int):
+        """Привязать сообщение очереди к уведомлению."""
+        async with self._session() as conn:
+            await conn.execute(
+                "UPDATE outbox SET notification_id = ? WHERE id = ?",
+                (notification_id, outbox_id),
+            )
+
+    async def get_due_outbox(self, now: datetime, limit: int) -> list[OutboxMessage]:
+        """Сообщения, которые пора отправить (по приоритету, при равном — в порядке постановки)."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                f"""
+                {_OUTBOX_SELECT}
+                WHERE status = ? AND next_attempt_at <= ?
+                ORDER BY priority, id
+                LIMIT ?
+                """,
+                (_OUTBOX_STATUS_TO_CODE[OutboxStatus.PENDING], _to_ts(now), limit),
+            )
+            return list(map(_decode_outbox_message, rows))
+
+    async def get_next_outbox_attempt(self) -> Optional[datetime]:
+        """Время ближайшей попытки среди неотправленных сообщений."""
+        async with self._session() as conn:
+            async with conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?",
+                (_OUTBOX_STATUS_TO_CODE[OutboxStatus.PENDING],),
+            ) as cursor:
+                row = await cursor.fetchone()
+        return _from_ts(row[0]) if row[0] is not None else None
+
+    async def mark_outbox_sent(self, message: OutboxMessage, message_id: int):
+        """Отметить сообщение отправленным."""
+        async with self._session() as conn:
+            await conn.execute(
+                """
+                UPDATE outbox SET status = ?, attempts = attempts + 1,
+                    sent_at = ?, message_id = ?, last_error = NULL
+                WHERE id = ?
+                """,
+                (
+                    _OUTBOX_STATUS_TO_CODE[OutboxStatus.SENT],
+                    _to_ts(datetime.now()),
+                    message_id,
+                    message.id,
+                ),
+            )
+
+    async def mark_outbox_failed(
+        self, outbox_id: int, error: str, next_attempt_at: Optional[datetime]
+    ):
+        """Записать неудачную попытку: повтор в next_attempt_at или FAILED, если None."""
+        if next_attempt_at is None:
+            status, next_ts = OutboxStatus.FAILED, _to_ts(datetime.now())
+        else:
+            status, next_ts = OutboxStatus.PENDING, _to_ts(next_attempt_at)
+
+        async with self._session() as conn:
+            await conn.execute(
+                """
+                UPDATE outbox SET status = ?, attempts = attempts + 1,
+                    next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+                """,
+                (_OUTBOX_STATUS_TO_CODE[status], next_ts, error, outbox_id),
+            )
+
+    async def prune_outbox(self, older_than: datetime) -> int:
+        """Удалить отправленные и окончательно неотправленные сообщения старше даты."""
+        async with self._session() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM outbox WHERE status != ? AND created_at < ?",
+                (_OUTBOX_STATUS_TO_CODE[OutboxStatus.PENDING], _to_ts(older_than)),
+            )
+            return cursor.rowcount
+
+    # Digest methods
+    async def create_digest(self, digest: Digest) -> bool:
+        """
+        Создать запись о сводном сообщении дня в чат.
+
+        Returns:
+            bool: False, если сводное сообщение за этот день в этот чат уже есть
+        """
+        async with self._session() as conn:
+            cursor = await conn.execute(
+                """
+                INSERT INTO digests (day, chat_id, message_id) VALUES (?, ?, ?)
+                ON CONFLICT(day, chat_id) DO NOTHING
+                """,
+                (_to_day(digest.day), digest.chat_id, digest.message_id),
+            )
+            return cursor.rowcount > 0
+
+    async def get_digest(self, day: date, chat_id: int) -> Optional[Digest]:
+        """Сводное сообщение за день в чат."""
+        async with self._session() as conn:
+            async with conn.execute(
+                "SELECT day, chat_id, message_id FROM digests WHERE day = ? AND chat_id = ?",
+                (_to_day(day), chat_id),
+            ) as cursor:
+                row = await cursor.fetchone()
+        return Digest(_from_day(row[0]), row[1], row[2]) if row else None
+
+    async def get_digest_by_message_id(self, chat_id: int, message_id: int) -> Optional[Digest]:
+        """Сводное сообщение по чату и ID сообщения в Telegram."""
+        async with self._session() as conn:
+            async with conn.execute(
+                "SELECT day, chat_id, message_id FROM digests WHERE chat_id = ? AND message_id = ?",
+                (chat_id, message_id),
+            ) as cursor:
+                row = await cursor.fetchone()
+        return Digest(_from_day(row[0]), row[1], row[2]) if row else None
+
+    async def set_digest_message_id(self, day: date, chat_id: int, message_id: int):
+        """Записать ID отправленного сводного сообщения."""
+        async with self._session() as conn:
+            await conn.execute(
+                "UPDATE digests SET message_id = ? WHERE day = ? AND chat_id = ?",
+                (message_id, _to_day(day), chat_id),
+            )
+
+    # Job ledger methods
+    async def get_job_runs(self) -> dict[str, datetime]:
+        """Время, на которое был назначен последний отработавший запуск каждой задачи."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall("SELECT job_id, scheduled_at FROM job_runs")
+        return {job_id: _from_ts(scheduled_at) for job_id, scheduled_at in rows}
+
+    async def record_job_run(self, job_id: str, scheduled_at: datetime):
+        """Записать успешный запуск задачи."""
+        async with self._session() as conn:
+            await conn.execute(
+                """
+                INSERT INTO job_runs (job_id, scheduled_at, finished_at) VALUES (?, ?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    scheduled_at = MAX(scheduled_at, excluded.scheduled_at),
+                    finished_at = excluded.finished_at
+                """,
+                (job_id, _to_ts(scheduled_at), _to_ts(datetime.now())),
+            )
+
+    async def is_daily_run_done(self, day: date, chat_id: int) -> bool:
+        """Завершена ли ежедневная рассылка за день в чат."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                "SELECT 1 FROM daily_runs WHERE day = ? AND chat_id = ?",
+                (_to_day(day), chat_id),
+            )
+        return bool(rows)
+
+    async def record_daily_run(self, day: date, chat_id: int):
+        """Записать завершённую ежедневную рассылку за день в чат."""
+        async with self._session() as conn:
+            await conn.execute(
+                """
+                INSERT INTO daily_runs (day, chat_id, finished_at) VALUES (?, ?, ?)
+                ON CONFLICT(day, chat_id) DO NOTHING
+                """,
+                (_to_day(day), chat_id, _to_ts(datetime.now())),
+            )
+
+    async def prune_daily_runs(self, older_than: date) -> int:
+        """Удалить записи журнала ежедневных рассылок старше даты."""
+        async with self._session() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM daily_runs WHERE day < ?", (_to_day(older_than),)
+            )
+            return cursor.rowcount
+
+    # Sheets journal methods
+    async def journal_sheets_cell(self, cell: SheetsCell):
+        """
+        Записать изменение ячейки в журнал Google Sheets.
+
+        Изменения одной ячейки схлопываются: побеждает последнее. Исключение —
+        запись «если пусто» поверх обычной: ячейка всё равно будет занята, она игнорируется.
+        """
+        async with self._session() as conn:
+            await conn.execute(
+                """
+                INSERT INTO sheets_journal
+                    (plant_name, day, value, color, if_empty, version, updated_at)
+                VALUES (?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(plant_name, day) DO UPDATE SET
+                    value = excluded.value,
+                    color = excluded.color,
+                    if_empty = excluded.if_empty,
+                    version = sheets_journal.version + 1,
+                    updated_at = excluded.updated_at
+                WHERE NOT (excluded.if_empty AND NOT sheets_journal.if_empty)
+                """,
+                (
+                    cell.plant_name,
+                    _to_day(cell.day),
+                    cell.value,
+                    _SHEETS_COLOR_TO_CODE[cell.color] if cell.color else None,
+                    int(cell.if_empty),
+                    _to_ts(datetime.now()),
+                ),
+            )
+
+    async def get_sheets_journal(self, limit: int) -> list[SheetsCell]:
+        """Самые старые записи журнала Google Sheets."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(
+                """
+                SELECT plant_name, day, value, color, if_empty, version FROM sheets_journal
+                ORDER BY updated_at
+                LIMIT ?
+                """,
+                (limit,),
+            )
+        return [
+            SheetsCell(
+                plant_name=plant_name,
+                day=_from_day(day),
+                value=value,
+                color=SHEETS_COLOR_CODES[color] if color is not None else None,
+                if_empty=bool(if_empty),
+                version=version,
+            )
+            for plant_name, day, value, color, if_empty, version in rows
+        ]
+
+    async def delete_sheets_journal(self, cells: list[SheetsCell]):
+        """Удалить записанные в таблицу записи журнала (если с тех пор они не менялись)."""
+        async with self.transaction():
+            await self.conn.executemany(
+                "DELETE FROM sheets_journal WHERE plant_name = ? AND day = ? AND version = ?",
+                [(cell.plant_name, _to_day(cell.day), cell.version) for cell in cells],
+            )
+
+    # Maintenance methods
+    async def archive_notifications(self, older_than: date) -> int:
+        """
+        Перенести закрытые уведомления (отвеченные и перенесённые) старше даты в архив.
+
+        Returns:
+            int: сколько уведомлений перенесено
+        """
+        params = (
+            _STATUS_TO_CODE[NotificationStatus.ANSWERED],
+            _STATUS_TO_CODE[NotificationStatus.RESCHEDULED],
+            _to_day(older_than),
+        )
+        async with self.transaction():
+            await self.conn.execute(
+                f"""
+                INSERT OR REPLACE INTO notifications_archive ({NOTIFICATION_COLUMNS})
+                SELECT {NOTIFICATION_COLUMNS} FROM notifications
+                WHERE status IN (?, ?) AND created_day < ?
+                """,
+                params,
+            )
+            cursor = await self.conn.execute(
+                """
+                DELETE FROM notifications
+                WHERE status IN (?, ?) AND created_day < ?
+                """,
+                params,
+            )
+            return cursor.rowcount
+
+    async def optimize(self):
+        """Обслуживание файла БД: статистика планировщика и возврат свободных страниц."""
+        async with self._session() as conn:
+            await conn.execute("ANALYZE")
+            await conn.execute("PRAGMA optimize")
+            # incremental_vacuum освобождает страницы по шагам — выбираем результат целиком
+            await conn.execute_fetchall("PRAGMA incremental_vacuum")
+            await conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
     # User Settings methods
     async def get_user_settings(self, user_id: int) -> Optional[UserSettings]:
         """Получить настройки пользователя."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM user_settings WHERE user_id = ?", (user_id,)
+        async with self._session() as conn:
+            async with conn.execute(
+                f"{_USER_SETTINGS_SELECT} WHERE user_id = ?", (user_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 if row:
-                    return UserSettings(
-                        user_id=row["user_id"],
-                        notification_time=row["notification_time"],
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                        updated_at=datetime.fromisoformat(row["updated_at"]),
-                    )
+                    return _decode_user_settings(row)
         return None
 
+    async def get_all_user_settings(self) -> list[UserSettings]:
+        """Получить настройки всех пользователей."""
+        async with self._session() as conn:
+            rows = await conn.execute_fetchall(_USER_SETTINGS_SELECT)
+            return list(map(_decode_user_settings, rows))
+
     async def upsert_user_settings(self, user_settings: UserSettings):
         """Обновить или создать настройки пользователя."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
+        now = datetime.now()
+        async with self._session() as conn:
+            await conn.execute(
                 """
                 INSERT INTO user_settings (user_id, notification_time, created_at, updated_at)
                 VALUES (?, ?, ?, ?)
@@ -331,11 +1024,10 @@ class Database:
                 (
                     user_settings.user_id,
                     user_settings.notification_time,
-                    user_settings.created_at.isoformat(),
-                    user_settings.updated_at.isoformat(),
+                    (user_settings.created_at or now).isoformat(),
+                    (user_settings.updated_at or now).isoformat(),
                 ),
             )
-            await db.commit()
 
 
 # Глобальный экземпляр
@@ -0,0 +1,476 @@
+"""Схема SQLite и миграции между её версиями."""
+
+from bot.database.models import (
+    NotificationStatus,
+    NotificationType,
+    OutboxStatus,
+    SheetsColor,
+    SoilMoisture,
+)
+
+# Версия схемы (PRAGMA user_version). Новая база создаётся сразу в актуальной схеме,
+# существующая доводится до неё миграциями в Database._migrate
+SCHEMA_VERSION = 10
+
+# Коды перечислений в БД: код — индекс значения в кортеже.
+# Новые значения добавлять только в конец, иначе поменяются коды старых строк.
+MOISTURE_CODES: tuple[SoilMoisture, ...] = (
+    SoilMoisture.WATERED,
+    SoilMoisture.VERY_WET,
+    SoilMoisture.SLIGHTLY_WET,
+    SoilMoisture.DRY,
+)
+NOTIFICATION_TYPE_CODES: tuple[NotificationType, ...] = (
+    NotificationType.CHECK,
+    NotificationType.WATER,
+)
+NOTIFICATION_STATUS_CODES: tuple[NotificationStatus, ...] = (
+    NotificationStatus.PENDING,
+    NotificationStatus.REMINDED,
+    NotificationStatus.ANSWERED,
+    NotificationStatus.RESCHEDULED,
+)
+OUTBOX_STATUS_CODES: tuple[OutboxStatus, ...] = (
+    OutboxStatus.PENDING,
+    OutboxStatus.SENT,
+    OutboxStatus.FAILED,
+)
+SHEETS_COLOR_CODES: tuple[SheetsColor, ...] = (
+    SheetsColor.YELLOW,
+    SheetsColor.GREEN,
+)
+
+# Содержимое таблицы enum_codes: (имя перечисления, коды)
+ENUM_CODES = {
+    "soil_moisture": MOISTURE_CODES,
+    "notification_type": NOTIFICATION_TYPE_CODES,
+    "notification_status": NOTIFICATION_STATUS_CODES,
+    "outbox_status": OUTBOX_STATUS_CODES,
+    "sheets_color": SHEETS_COLOR_CODES,
+}
+
+# Порядок столбцов в notifications зависит от истории миграций,
+# поэтому при переносе в архив столбцы перечисляются явно
+NOTIFICATION_COLUMNS = (
+    "id, plant_id, notification_type, status, message_id, "
+    "created_at, created_day, answered_at, answer, chat_id"
+)
+
+# Даты хранятся как номер дня от 1970-01-01, время — как unix time в секундах,
+# перечисления — как коды из ENUM_CODES
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS plant_status (
+        plant_id TEXT PRIMARY KEY,
+        last_moisture INTEGER NOT NULL,
+        last_check_day INTEGER NOT NULL,
+        next_check_day INTEGER NOT NULL,
+        overdue_days INTEGER NOT NULL DEFAULT 0,
+        updated_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plant_id TEXT NOT NULL,
+        notification_type INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        message_id INTEGER,
+        created_at INTEGER NOT NULL,
+        created_day INTEGER NOT NULL,  -- календарный день created_at
+        answered_at INTEGER,
+        answer TEXT,
+        chat_id INTEGER  -- чат, в который отправлено сообщение
+    );
+
+    -- Закрытые уведомления старше срока хранения (см. Database.archive_notifications)
+    CREATE TABLE IF NOT EXISTS notifications_archive (
+        id INTEGER PRIMARY KEY,
+        plant_id TEXT NOT NULL,
+        notification_type INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        message_id INTEGER,
+        created_at INTEGER NOT NULL,
+        created_day INTEGER NOT NULL,
+        answered_at INTEGER,
+        answer TEXT,
+        chat_id INTEGER
+    );
+
+    -- Очередь исходящих сообщений (см. bot/services/outbox.py)
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        chat_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        reply_markup TEXT,
+        notification_id INTEGER,
+        status INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at INTEGER NOT NULL,
+        created_at INTEGER NOT NULL,
+        sent_at INTEGER,
+        message_id INTEGER,
+        last_error TEXT,
+        priority INTEGER NOT NULL DEFAULT 0  -- меньше — раньше отправка
+    );
+
+    -- Сводное сообщение дня в чат в режиме дайджеста
+    CREATE TABLE IF NOT EXISTS digests (
+        day INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        message_id INTEGER,
+        PRIMARY KEY (day, chat_id),
+        UNIQUE (chat_id, message_id)
+    );
+
+    -- Журнал запусков задач планировщика: последний отработавший запуск каждой задачи
+    CREATE TABLE IF NOT EXISTS job_runs (
+        job_id TEXT PRIMARY KEY,
+        scheduled_at INTEGER NOT NULL,  -- на какое время был назначен запуск
+        finished_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    -- Журнал ежедневных рассылок: рассылка за день в чат завершена
+    CREATE TABLE IF NOT EXISTS daily_runs (
+        day INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        finished_at INTEGER NOT NULL,
+        PRIMARY KEY (day, chat_id)
+    ) WITHOUT ROWID;
+
+    -- Журнал отложенной записи в Google Sheets: последнее значение каждой ячейки
+    CREATE TABLE IF NOT EXISTS sheets_journal (
+        plant_name TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        value TEXT NOT NULL,
+        color INTEGER,
+        if_empty INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        PRIMARY KEY (plant_name, day)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS user_settings (
+        user_id INTEGER PRIMARY KEY,
+        notification_time TEXT NOT NULL DEFAULT '09:00',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+
+    -- Уведомление растения за день (проверка «уже отправляли сегодня»)
+    CREATE INDEX IF NOT EXISTS idx_notifications_plant_day
+    ON notifications(plant_id, created_day, notification_type);
+
+    -- Неотвеченные за день (напоминания и перенос)
+    CREATE INDEX IF NOT EXISTS idx_notifications_status_day
+    ON notifications(status, created_day);
+
+    -- Все уведомления дня (дедупликация рассылки и сводка)
+    CREATE INDEX IF NOT EXISTS idx_notifications_day
+    ON notifications(created_day, plant_id, notification_type);
+
+    -- Поиск уведомления по нажатой кнопке (message_id уникален только в пределах чата)
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_chat_message
+    ON notifications(chat_id, message_id);
+
+    -- Сообщения, которые пора отправить
+    CREATE INDEX IF NOT EXISTS idx_outbox_status_next_attempt
+    ON outbox(status, next_attempt_at);
+"""
+
+# v0 -> v1: created_date вместо DATE(created_at), составные индексы и индекс по message_id
+MIGRATION_V1 = """
+    BEGIN;
+
+    ALTER TABLE notifications ADD COLUMN created_date TEXT;
+    UPDATE notifications SET created_date = DATE(created_at);
+
+    -- Для уникального индекса оставляем message_id только у последней записи
+    UPDATE notifications SET message_id = NULL
+    WHERE message_id IS NOT NULL
+    AND id NOT IN (
+        SELECT MAX(id) FROM notifications
+        WHERE message_id IS NOT NULL
+        GROUP BY message_id
+    );
+
+    DROP INDEX IF EXISTS idx_notifications_status;
+    DROP INDEX IF EXISTS idx_notifications_date;
+
+    CREATE INDEX IF NOT EXISTS idx_notifications_plant_day
+    ON notifications(plant_id, created_date, notification_type);
+
+    CREATE INDEX IF NOT EXISTS idx_notifications_status_day
+    ON notifications(status, created_date);
+
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_message_id
+    ON notifications(message_id);
+
+    PRAGMA user_version = 1;
+
+    COMMIT;
+"""
+
+# v1 -> v2: архив уведомлений
+MIGRATION_V2 = """
+    BEGIN;
+
+    CREATE TABLE IF NOT EXISTS notifications_archive (
+        id INTEGER PRIMARY KEY,
+        plant_id TEXT NOT NULL,
+        notification_type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        message_id INTEGER,
+        created_at TEXT NOT NULL,
+        created_date TEXT NOT NULL,
+        answered_at TEXT,
+        answer TEXT
+    );
+
+    PRAGMA user_version = 2;
+
+    COMMIT;
+"""
+
+# Расшифровка кодов перечислений: нужна миграции v3 и для чтения базы вручную.
+# Создаётся и синхронизируется с ENUM_CODES при каждом запуске
+ENUM_CODES_TABLE = """
+    CREATE TABLE IF NOT EXISTS enum_codes (
+        enum TEXT NOT NULL,
+        code INTEGER NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (enum, code)
+    ) WITHOUT ROWID;
+"""
+
+# Выражения перевода старых значений: ISO-дата -> номер дня, локальное ISO-время -> unix time
+_DAY_FROM_ISO = "CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+_TS_FROM_ISO = "CAST(strftime('%s', {column}, 'utc') AS INTEGER)"
+_CODE_FROM_VALUE = "(SELECT code FROM enum_codes WHERE enum = '{enum}' AND value = {column})"
+
+
+def _notifications_v3_select(table: str) -> str:
+    """SELECT, переводящий строки notifications/notifications_archive в формат v3."""
+    return f"""
+        SELECT
+            id,
+            plant_id,
+            {_CODE_FROM_VALUE.format(enum="notification_type", column="notification_type")},
+            {_CODE_FROM_VALUE.format(enum="notification_status", column="status")},
+            message_id,
+            {_TS_FROM_ISO.format(column="created_at")},
+            {_DAY_FROM_ISO.format(column="created_date")},
+            {_TS_FROM_ISO.format(column="answered_at")},
+            answer
+        FROM {table}
+    """
+
+
+# Столбцы notifications в схеме v3 (NOTIFICATION_COLUMNS — в актуальной)
+_NOTIFICATION_COLUMNS_V3 = (
+    "id, plant_id, notification_type, status, message_id, "
+    "created_at, created_day, answered_at, answer"
+)
+
+
+# v2 -> v3: компактный формат (номера дней, коды перечислений, plant_status WITHOUT ROWID)
+MIGRATION_V3 = f"""
+    BEGIN;
+
+    CREATE TABLE plant_status_v3 (
+        plant_id TEXT PRIMARY KEY,
+        last_moisture INTEGER NOT NULL,
+        last_check_day INTEGER NOT NULL,
+        next_check_day INTEGER NOT NULL,
+        overdue_days INTEGER NOT NULL DEFAULT 0,
+        updated_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    INSERT INTO plant_status_v3
+    SELECT
+        plant_id,
+        {_CODE_FROM_VALUE.format(enum="soil_moisture", column="last_moisture")},
+        {_DAY_FROM_ISO.format(column="last_check_date")},
+        {_DAY_FROM_ISO.format(column="next_check_date")},
+        COALESCE(overdue_days, 0),
+        {_TS_FROM_ISO.format(column="updated_at")}
+    FROM plant_status;
+
+    DROP TABLE plant_status;
+    ALTER TABLE plant_status_v3 RENAME TO plant_status;
+
+    CREATE TABLE notifications_v3 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plant_id TEXT NOT NULL,
+        notification_type INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        message_id INTEGER,
+        created_at INTEGER NOT NULL,
+        created_day INTEGER NOT NULL,
+        answered_at INTEGER,
+        answer TEXT
+    );
+
+    INSERT INTO notifications_v3 ({_NOTIFICATION_COLUMNS_V3})
+    {_notifications_v3_select("notifications")};
+
+    DROP TABLE notifications;
+    ALTER TABLE notifications_v3 RENAME TO notifications;
+
+    CREATE TABLE notifications_archive_v3 (
+        id INTEGER PRIMARY KEY,
+        plant_id TEXT NOT NULL,
+        notification_type INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        message_id INTEGER,
+        created_at INTEGER NOT NULL,
+        created_day INTEGER NOT NULL,
+        answered_at INTEGER,
+        answer TEXT
+    );
+
+    INSERT INTO notifications_archive_v3 ({_NOTIFICATION_COLUMNS_V3})
+    {_notifications_v3_select("notifications_archive")};
+
+    DROP TABLE notifications_archive;
+    ALTER TABLE notifications_archive_v3 RENAME TO notifications_archive;
+
+    CREATE INDEX idx_notifications_plant_day
+    ON notifications(plant_id, created_day, notification_type);
+
+    CREATE INDEX idx_notifications_status_day
+    ON notifications(status, created_day);
+
+    CREATE UNIQUE INDEX idx_notifications_message_id
+    ON notifications(message_id);
+
+    PRAGMA user_version = 3;
+
+    COMMIT;
+"""
+
+# v3 -> v4: очередь исходящих сообщений; уведомления запоминают чат сообщения
+# (чат уже отправленных уведомлений проставляет Database._migrate)
+MIGRATION_V4 = """
+    BEGIN;
+
+    ALTER TABLE notifications ADD COLUMN chat_id INTEGER;
+    ALTER TABLE notifications_archive ADD COLUMN chat_id INTEGER;
+
+    DROP INDEX IF EXISTS idx_notifications_message_id;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_chat_message
+    ON notifications(chat_id, message_id);
+
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        chat_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        reply_markup TEXT,
+        notification_id INTEGER,
+        status INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at INTEGER NOT NULL,
+        created_at INTEGER NOT NULL,
+        sent_at INTEGER,
+        message_id INTEGER,
+        last_error TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_outbox_status_next_attempt
+    ON outbox(status, next_attempt_at);
+
+    PRAGMA user_version = 4;
+
+    COMMIT;
+"""
+
+# v4 -> v5: сводные сообщения (режим дайджеста), своё у каждого чата
+MIGRATION_V5 = """
+    BEGIN;
+
+    CREATE TABLE IF NOT EXISTS digests (
+        day INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        message_id INTEGER,
+        PRIMARY KEY (day, chat_id),
+        UNIQUE (chat_id, message_id)
+    );
+
+    PRAGMA user_version = 5;
+
+    COMMIT;
+"""
+
+# v5 -> v6: журнал запусков задач планировщика
+MIGRATION_V6 = """
+    BEGIN;
+
+    CREATE TABLE IF NOT EXISTS job_runs (
+        job_id TEXT PRIMARY KEY,
+        scheduled_at INTEGER NOT NULL,
+        finished_at INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    PRAGMA user_version = 6;
+
+    COMMIT;
+"""
+
+# v6 -> v7: журнал ежедневных рассылок
+MIGRATION_V7 = """
+    BEGIN;
+
+    CREATE TABLE IF NOT EXISTS daily_runs (
+        day INTEGER NOT NULL,
+        chat_id INTEGER NOT NULL,
+        finished_at INTEGER NOT NULL,
+        PRIMARY KEY (day, chat_id)
+    ) WITHOUT ROWID;
+
+    PRAGMA user_version = 7;
+
+    COMMIT;
+"""
+
+# v7 -> v8: приоритет сообщений в очереди
+MIGRATION_V8 = """
+    BEGIN;
+
+    ALTER TABLE outbox ADD COLUMN priority INTEGER NOT NULL DEFAULT 0;
+
+    PRAGMA user_version = 8;
+
+    COMMIT;
+"""
+
+# v8 -> v9: журнал отложенной записи в Google Sheets
+MIGRATION_V9 = """
+    BEGIN;
+
+    CREATE TABLE IF NOT EXISTS sheets_journal (
+        plant_name TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        value TEXT NOT NULL,
+        color INTEGER,
+        if_empty INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        PRIMARY KEY (plant_name, day)
+    ) WITHOUT ROWID;
+
+    PRAGMA user_version = 9;
+
+    COMMIT;
+"""
+
+# v9 -> v10: индекс по дню уведомления (выборки «все уведомления за день»)
+MIGRATION_V10 = """
+    BEGIN;
+
+    CREATE INDEX IF NOT EXISTS idx_notifications_day
+    ON notifications(created_day, plant_id, notification_type);
+
+    PRAGMA user_version = 10;
+
+    COMMIT;
+"""
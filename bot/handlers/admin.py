@@ -1,11 +1,16 @@
 """Админка для управления состояниями растений."""
 
-from datetime import date
+from datetime import date, datetime
 
 from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
-from bot.database.models import SoilMoisture
+from bot.database.models import (
+    Notification,
+    NotificationStatus,
+    NotificationType,
+    SoilMoisture,
+)
 from bot.config import settings
 from bot.keyboards.inline import (
     get_admin_keyboard,
@@ -13,11 +18,16 @@ from bot.keyboards.inline import (
     get_admin_plants_list_keyboard,
     get_watering_keyboard,
 )
+from bot.services.outbox import outbox
 from bot.services.plant_service import plant_service
 from bot.services.sheets import sheets_service
 
 router = Router()
 
+# Прогноз в админке: длина периода и число прогонов для усреднения
+_FORECAST_DAYS = 14
+_FORECAST_RUNS = 200
+
 
 @router.callback_query(F.data == "menu:admin")
 async def menu_admin(callback: CallbackQuery):
@@ -50,6 +60,50 @@ async def menu_admin(callback: CallbackQuery):
     await callback.answer()
 
 
+@router.callback_query(F.data == "admin:forecast")
+async def admin_forecast(callback: CallbackQuery):
+    """Ожидаемое число проверок и поливов по дням на две недели вперёд."""
+    forecast = await plant_service.get_forecast(days=_FORECAST_DAYS, runs=_FORECAST_RUNS)
+
+    text = "📈 <b>Прогноз на две недели</b>\n\n"
+    for day, checks, waterings in forecast.daily_counts():
+        text += f"{day.strftime('%d.%m')}: 🌱 {checks:.1f} · 🚿 {waterings:.1f}\n"
+    text += "\n🌱 — проверки почвы, 🚿 — поливы (в среднем по прогонам)"
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=get_admin_keyboard(),
+        parse_mode="HTML",
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "admin:schedule")
+async def admin_schedule(callback: CallbackQuery):
+    """Назначенные проверки по дням на неделю вперёд."""
+    schedule = await plant_service.get_due_schedule()
+
+    text = "📅 <b>Проверки на неделю</b>\n\n"
+    for day, plants in schedule:
+        names = ", ".join(plant.name for plant in plants)
+        text += f"<b>{day.strftime('%d.%m')}</b>: {names}\n"
+
+    if not schedule:
+        next_due = await plant_service.get_next_due()
+        if next_due is None:
+            text += "Проверок не назначено"
+        else:
+            plant, day = next_due
+            text += f"На неделе проверок нет, ближайшая — {plant.name}, {day.strftime('%d.%m')}"
+
+    await callback.message.edit_text(
+        text,
+        reply_markup=get_admin_keyboard(),
+        parse_mode="HTML",
+    )
+    await callback.answer()
+
+
 @router.callback_query(F.data.startswith("admin:plant:"))
 async def admin_plant(callback: CallbackQuery):
     """Управление конкретным растением."""
@@ -111,13 +165,15 @@ async def admin_set_status(callback: CallbackQuery):
     # Обрабатываем изменение статуса
     if moisture == SoilMoisture.WATERED:
         next_check = await plant_service.process_watering_done(plant_id)
-        await sheets_service.mark_answered(plant.name, "✅")
+        answer = "✅"
     else:
         next_check, _ = await plant_service.process_moisture_answer(plant_id, moisture)
-        await sheets_service.mark_answered(plant.name, _moisture_emoji(moisture))
+        answer = _moisture_emoji(moisture)
 
-    # Отмечаем запланированную дату в таблице
-    await sheets_service.mark_scheduled(plant.name, next_check)
+    # Отмечаем ответ и запланированную дату в таблице одним пакетом
+    async with sheets_service.batch():
+        await sheets_service.mark_answered(plant.name, answer)
+        await sheets_service.mark_scheduled(plant.name, next_check)
 
     # Если сухая и полив нужен сегодня — сразу отправляем уведомление
     today = date.today()
@@ -131,11 +187,20 @@ async def admin_set_status(callback: CallbackQuery):
         )
         
         # Отправляем уведомление о поливе
-        await callback.message.answer(
+        await outbox.enqueue_notification(
+            f"{NotificationType.WATER.value}:{plant_id}:{today.isoformat()}",
+            Notification(
+                id=None,
+                plant_id=plant_id,
+                notification_type=NotificationType.WATER,
+                status=NotificationStatus.PENDING,
+                message_id=None,
+                created_at=datetime.now(),
+            ),
+            callback.message.chat.id,
             f"🚿 <b>{plant.name}</b>\n\n"
             f"Почва сухая — пожалуйста, полей цветок!",
-            reply_markup=get_watering_keyboard(plant_id),
-            parse_mode="HTML",
+            get_watering_keyboard(plant_id),
         )
         await callback.answer("Отправлено уведомление о поливе!")
         return
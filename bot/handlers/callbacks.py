@@ -1,17 +1,24 @@
 """Обработчики callback-кнопок уведомлений."""
 
-from datetime import date
+from datetime import date, datetime
 
 from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
-from bot.database.models import NotificationStatus, SoilMoisture
+from bot.database.models import (
+    Notification,
+    NotificationStatus,
+    NotificationType,
+    SoilMoisture,
+)
 from bot.database.repository import db
 from bot.keyboards.inline import (
     get_answered_keyboard,
     get_moisture_keyboard,
     get_watering_keyboard,
 )
+from bot.services.digest import digest_service
+from bot.services.outbox import outbox
 from bot.services.plant_service import plant_service
 from bot.services.sheets import sheets_service
 
@@ -42,25 +49,44 @@ async def handle_moisture_answer(callback: CallbackQuery):
         await callback.answer("Неверное значение", show_alert=True)
         return
 
-    # Обрабатываем ответ
-    next_check, message = await plant_service.process_moisture_answer(plant_id, moisture)
+    # Обрабатываем ответ и обновляем уведомление одной транзакцией
+    today = date.today()
+    async with db.transaction():
+        next_check, message = await plant_service.process_moisture_answer(plant_id, moisture)
 
-    # Обновляем уведомление в БД
-    notification = await db.get_notification_by_message_id(callback.message.message_id)
-    if notification:
-        await db.update_notification(
-            notification.id, NotificationStatus.ANSWERED, moisture_value
+        notification = await db.get_notification_by_message_id(
+            callback.message.chat.id, callback.message.message_id
         )
-
-    # Логируем в Google Sheets
-    await sheets_service.mark_answered(plant.name, _format_moisture_short(moisture_value))
-    await sheets_service.mark_scheduled(plant.name, next_check)
+        digest = None
+        if notification is None:
+            # Ответ из сводного сообщения (режим дайджеста)
+            digest, notification = await digest_service.find(
+                callback.message.chat.id,
+                callback.message.message_id,
+                plant_id,
+                NotificationType.CHECK,
+            )
+        if notification:
+            await db.update_notification(
+                notification.id, NotificationStatus.ANSWERED, moisture_value
+            )
+        if digest and moisture == SoilMoisture.DRY and next_check == today:
+            await digest_service.add_watering(digest, plant_id)
+
+    # Логируем в Google Sheets (одним пакетом)
+    async with sheets_service.batch():
+        await sheets_service.mark_answered(plant.name, _format_moisture_short(moisture_value))
+        await sheets_service.mark_scheduled(plant.name, next_check)
+
+    if digest:
+        await digest_service.refresh(digest, after_plant=plant_id)
+        await callback.answer("Нужен полив!" if next_check == today else "Ответ сохранён!")
+        return
 
     # Формируем текст ответа
     answer_text = _format_moisture(moisture_value)
     
     # Если сухая и полив нужен сегодня — сразу отправляем уведомление о поливе
-    today = date.today()
     if moisture == SoilMoisture.DRY and next_check == today:
         await callback.message.edit_text(
             f"🌱 <b>{plant.name}</b>\n\n"
@@ -70,11 +96,20 @@ async def handle_moisture_answer(callback: CallbackQuery):
         )
         
         # Отправляем уведомление о поливе
-        await callback.message.answer(
+        await outbox.enqueue_notification(
+            f"{NotificationType.WATER.value}:{plant_id}:{today.isoformat()}",
+            Notification(
+                id=None,
+                plant_id=plant_id,
+                notification_type=NotificationType.WATER,
+                status=NotificationStatus.PENDING,
+                message_id=None,
+                created_at=datetime.now(),
+            ),
+            callback.message.chat.id,
             f"🚿 <b>{plant.name}</b>\n\n"
             f"Почва сухая — пожалуйста, полей цветок!",
-            reply_markup=get_watering_keyboard(plant_id),
-            parse_mode="HTML",
+            get_watering_keyboard(plant_id),
         )
         await callback.answer("Нужен полив!")
         return
@@ -107,19 +142,36 @@ async def handle_watered(callback: CallbackQuery):
         await callback.answer("Растение не найдено", show_alert=True)
         return
 
-    # Обрабатываем полив
-    next_check = await plant_service.process_watering_done(plant_id)
+    # Обрабатываем полив и обновляем уведомление одной транзакцией
+    async with db.transaction():
+        next_check = await plant_service.process_watering_done(plant_id)
 
-    # Обновляем уведомление в БД
-    notification = await db.get_notification_by_message_id(callback.message.message_id)
-    if notification:
-        await db.update_notification(
-            notification.id, NotificationStatus.ANSWERED, "watered"
+        notification = await db.get_notification_by_message_id(
+            callback.message.chat.id, callback.message.message_id
         )
-
-    # Логируем в Google Sheets
-    await sheets_service.mark_answered(plant.name, "✅")
-    await sheets_service.mark_scheduled(plant.name, next_check)
+        digest = None
+        if notification is None:
+            # Ответ из сводного сообщения (режим дайджеста)
+            digest, notification = await digest_service.find(
+                callback.message.chat.id,
+                callback.message.message_id,
+                plant_id,
+                NotificationType.WATER,
+            )
+        if notification:
+            await db.update_notification(
+                notification.id, NotificationStatus.ANSWERED, "watered"
+            )
+
+    # Логируем в Google Sheets (одним пакетом)
+    async with sheets_service.batch():
+        await sheets_service.mark_answered(plant.name, "✅")
+        await sheets_service.mark_scheduled(plant.name, next_check)
+
+    if digest:
+        await digest_service.refresh(digest, after_plant=plant_id)
+        await callback.answer("Отлично! 🌱")
+        return
 
     # Обновляем сообщение
     await callback.message.edit_text(
@@ -143,7 +195,9 @@ async def handle_correct_answer(callback: CallbackQuery):
         return
 
     # Определяем тип уведомления по предыдущему сообщению
-    notification = await db.get_notification_by_message_id(callback.message.message_id)
+    notification = await db.get_notification_by_message_id(
+        callback.message.chat.id, callback.message.message_id
+    )
 
     if notification and notification.answer == "watered":
         # Было уведомление о поливе
@@ -162,6 +216,22 @@ async def handle_correct_answer(callback: CallbackQuery):
     await callback.answer("Выбери новый ответ")
 
 
+@router.callback_query(F.data.startswith("digest:"))
+async def handle_digest_page(callback: CallbackQuery):
+    """Листание сводного сообщения."""
+    page = int(callback.data.split(":")[1])
+
+    digest = await db.get_digest_by_message_id(
+        callback.message.chat.id, callback.message.message_id
+    )
+    if not digest:
+        await callback.answer("Сводка устарела", show_alert=True)
+        return
+
+    await digest_service.refresh(digest, page=page)
+    await callback.answer()
+
+
 @router.callback_query(F.data == "close_message")
 async def handle_close_message(callback: CallbackQuery):
     """Закрыть сообщение."""
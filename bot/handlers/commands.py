@@ -5,8 +5,10 @@ from aiogram.filters import Command, CommandStart
 from aiogram.types import Message
 
 from bot.config import settings
+from bot.database.repository import db
 from bot.keyboards.inline import get_main_menu_keyboard
 from bot.keyboards.reply import get_main_reply_keyboard
+from bot.services.scheduler import notification_scheduler
 
 router = Router()
 
@@ -49,3 +51,41 @@ async def cmd_menu(message: Message):
         reply_markup=get_main_reply_keyboard(),
         parse_mode="HTML",
     )
+
+
+@router.message(Command("time"))
+@admin_only
+async def cmd_time(message: Message):
+    """Обработчик команды /time ЧЧ:ММ — время ежедневных уведомлений."""
+    parts = (message.text or "").split(maxsplit=1)
+    if len(parts) < 2:
+        user_settings = await db.get_user_settings(message.from_user.id)
+        current = user_settings.notification_time if user_settings else settings.notification_time
+        await message.answer(
+            f"⏰ Уведомления приходят в <b>{current}</b>\n\n"
+            "Чтобы изменить, отправь /time ЧЧ:ММ",
+            parse_mode="HTML",
+        )
+        return
+
+    try:
+        time_str = await notification_scheduler.set_notification_time(
+            message.from_user.id, parts[1]
+        )
+    except ValueError:
+        await message.answer("Не понял время. Пример: /time 09:30")
+        return
+
+    if not notification_scheduler.is_recipient(message.from_user.id):
+        await message.answer(
+            f"✅ Время <b>{time_str}</b> сохранено\n\n"
+            "Сейчас уведомления получает активный поливальщик — "
+            "это время начнёт действовать, когда им станешь ты",
+            parse_mode="HTML",
+        )
+        return
+
+    await message.answer(
+        f"✅ Теперь уведомления будут приходить в <b>{time_str}</b>",
+        parse_mode="HTML",
+    )
@@ -1,5 +1,7 @@
 """Inline клавиатуры."""
 
+from typing import Optional
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
@@ -60,6 +62,40 @@ def get_watering_keyboard(plant_id: str) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def get_digest_keyboard(
+    plant_id: str, action: Optional[str], page: int, total: int
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура сводного сообщения: кнопки одного растения и листание.
+
+    action: "check" — кнопки влажности, "water" — кнопка полива, None — уже отвечено.
+    """
+    builder = InlineKeyboardBuilder()
+
+    builder.row(
+        InlineKeyboardButton(text="🖼 Как выглядит?", callback_data=f"show_photo:{plant_id}")
+    )
+    if action == "check":
+        builder.row(
+            InlineKeyboardButton(text="💧💧", callback_data=f"moisture:{plant_id}:very_wet"),
+            InlineKeyboardButton(text="💧", callback_data=f"moisture:{plant_id}:slightly_wet"),
+            InlineKeyboardButton(text="🏜", callback_data=f"moisture:{plant_id}:dry"),
+        )
+    elif action == "water":
+        builder.row(
+            InlineKeyboardButton(text="✅ Полито", callback_data=f"watered:{plant_id}")
+        )
+
+    if total > 1:
+        builder.row(
+            InlineKeyboardButton(text="◀️", callback_data=f"digest:{(page - 1) % total}"),
+            InlineKeyboardButton(text=f"{page + 1}/{total}", callback_data="noop"),
+            InlineKeyboardButton(text="▶️", callback_data=f"digest:{(page + 1) % total}"),
+        )
+
+    return builder.as_markup()
+
+
 def get_answered_keyboard(plant_id: str, answer_text: str) -> InlineKeyboardMarkup:
     """Клавиатура после ответа (с кнопкой исправления)."""
     builder = InlineKeyboardBuilder()
@@ -159,6 +195,12 @@ def get_admin_plants_list_keyboard(plants: list) -> InlineKeyboardMarkup:
             )
         )
 
+    builder.row(
+        InlineKeyboardButton(text="📅 Проверки на неделю", callback_data="admin:schedule")
+    )
+    builder.row(
+        InlineKeyboardButton(text="📈 Прогноз на две недели", callback_data="admin:forecast")
+    )
     builder.row(
         InlineKeyboardButton(text="◀️ В меню", callback_data="menu:main")
     )
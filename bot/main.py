@@ -18,6 +18,7 @@ from bot.handlers import (
     plants_router,
     reply_buttons_router,
 )
+from bot.services.outbox import outbox
 from bot.services.plant_service import plant_service
 from bot.services.scheduler import notification_scheduler
 from bot.services.sheets import sheets_service
@@ -38,20 +39,27 @@ async def on_startup(bot: Bot):
     logger.info("Инициализация базы данных...")
     await db.init()
 
+    logger.info("Загрузка статусов растений...")
+    await plant_service.load_statuses()
+
     logger.info("Инициализация Google Sheets...")
     await sheets_service.init()
 
     # Инициализируем растения в таблице
     plants = plant_service.get_all_plants()
     await sheets_service.init_plants([p.name for p in plants])
+    sheets_service.start()
 
     logger.info("Запуск планировщика...")
     notification_scheduler.set_bot(bot)
     await notification_scheduler.start()
 
-    # Проверяем уведомления при старте (для новых растений и пропущенных)
-    logger.info("Проверка уведомлений при старте...")
-    await notification_scheduler.run_daily_check()
+    # Отправка сообщений из очереди (в том числе оставшихся с прошлого запуска)
+    outbox.start()
+
+    # Выполняем запуски, пропущенные пока бот был выключен
+    logger.info("Проверка пропущенных запусков...")
+    await notification_scheduler.catch_up_missed_jobs()
 
     # # Уведомление о запуске
     # try:
@@ -73,6 +81,17 @@ async def on_shutdown(bot: Bot):
     logger.info("Остановка планировщика...")
     notification_scheduler.stop()
 
+    logger.info("Остановка очереди сообщений...")
+    await outbox.stop()
+
+    logger.info("Запись журнала в Google Sheets...")
+    await sheets_service.close()
+
+    logger.info(f"Кэш статусов растений: {plant_service.get_cache_stats()}")
+
+    logger.info("Закрытие базы данных...")
+    await db.close()
+
     logger.info("Бот остановлен.")
 
 
@@ -0,0 +1,230 @@
+"""Режим дайджеста: одно сводное сообщение в день вместо сообщения на каждое растение."""
+
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.database.models import (
+    Digest,
+    Notification,
+    NotificationStatus,
+    NotificationType,
+    OutboxMessage,
+    Plant,
+)
+from bot.database.repository import db
+from bot.keyboards.inline import get_digest_keyboard
+from bot.services.outbox import outbox
+from bot.services.plant_service import plant_service
+from bot.services.sender import telegram_sender
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_KEY_PREFIX = "digest:"
+
+# Ответы в уведомлениях -> подпись в сводке
+_ANSWER_LABELS = {
+    "watered": "полито",
+    "very_wet": "очень влажная",
+    "slightly_wet": "слегка влажная",
+    "dry": "сухая",
+}
+
+_OPEN_STATUSES = (NotificationStatus.PENDING, NotificationStatus.REMINDED)
+
+
+class DigestService:
+    """
+    Сводное сообщение дня.
+
+    Все уведомления дня собираются в одно сообщение со списком растений и клавиатурой
+    одного растения с листанием. Кнопки те же (moisture:/watered:), что у отдельных
+    уведомлений, а после каждого ответа сообщение редактируется на месте.
+    """
+
+    def __init__(self):
+        outbox.add_sent_hook(self._on_sent)
+
+    async def enqueue(self, day: date, chat_id: int, notifications: list[Notification]) -> int:
+        """
+        Создать уведомления дня и поставить сводное сообщение в очередь.
+
+        Если сводное сообщение за день в этот чат уже есть, новые уведомления добавляются в него.
+
+        Returns:
+            int: сколько уведомлений добавлено
+        """
+        async with db.transaction():
+            for notification in notifications:
+                notification.id = await db.create_notification(notification)
+
+            created = await db.create_digest(Digest(day=day, chat_id=chat_id))
+            if created:
+                text, keyboard = await self.render(day)
+                await outbox.enqueue(
+                    f"{_DIGEST_KEY_PREFIX}{day.isoformat()}:{chat_id}", chat_id, text, keyboard
+                )
+
+        if not created and notifications:
+            await self.refresh(await db.get_digest(day, chat_id))
+        return len(notifications)
+
+    async def find(
+        self, chat_id: int, message_id: int, plant_id: str, notification_type: NotificationType
+    ) -> tuple[Optional[Digest], Optional[Notification]]:
+        """
+        Найти сводное сообщение по чату и ID сообщения и открытое уведомление растения в нём.
+
+        Returns:
+            tuple: (сводное сообщение или None, уведомление или None)
+        """
+        digest = await db.get_digest_by_message_id(chat_id, message_id)
+        if digest is None:
+            return None, None
+
+        for notification in await db.get_notifications_for_day(digest.day):
+            if (
+                notification.plant_id == plant_id
+                and notification.notification_type == notification_type
+                and notification.status in _OPEN_STATUSES
+            ):
+                return digest, notification
+        return digest, None
+
+    async def add_watering(self, digest: Digest, plant_id: str):
+        """Добавить в сводку просьбу полить (если её ещё нет)."""
+        existing = await db.get_today_notification_for_plant(plant_id, NotificationType.WATER)
+        if existing:
+            return
+
+        await db.create_notification(
+            Notification(
+                id=None,
+                plant_id=plant_id,
+                notification_type=NotificationType.WATER,
+                status=NotificationStatus.PENDING,
+                message_id=None,
+                created_at=datetime.now(),
+            )
+        )
+
+    async def render(
+        self, day: date, page: int = None, after_plant: str = None
+    ) -> tuple[str, Optional[InlineKeyboardMarkup]]:
+        """
+        Текст и клавиатура сводки.
+
+        Args:
+            page: Растение, кнопки которого показать (индекс в списке)
+            after_plant: Показать следующее неотвеченное после этого растения
+        """
+        items = [
+            (plant, notification)
+            for notification in await db.get_notifications_for_day(day)
+            if (plant := plant_service.get_plant(notification.plant_id)) is not None
+        ]
+        title = f"📋 <b>Растения на {day.strftime('%d.%m')}</b>"
+        if not items:
+            return f"{title}\n\nСегодня ничего не нужно 🌿", None
+
+        page = _choose_page(items, page, after_plant)
+        lines = []
+        for index, (plant, notification) in enumerate(items):
+            marker = "👉 " if index == page else ""
+            lines.append(f"{marker}{await _format_item(plant, notification)}")
+
+        answered = sum(1 for _, n in items if n.status not in _OPEN_STATUSES)
+        text = f"{title}\n\n" + "\n".join(lines) + f"\n\nОтвечено {answered} из {len(items)}"
+
+        plant, notification = items[page]
+        action = None
+        if notification.status in _OPEN_STATUSES:
+            action = notification.notification_type.value
+        keyboard = get_digest_keyboard(plant.id, action, page, len(items))
+        return text, keyboard
+
+    async def refresh(self, digest: Digest, page: int = None, after_plant: str = None):
+        """Перерисовать отправленное сводное сообщение."""
+        if digest is None or digest.message_id is None:
+            # Ещё в очереди — обновится сразу после отправки
+            return
+
+        text, keyboard = await self.render(digest.day, page, after_plant)
+        await self._edit(digest, text, keyboard)
+
+    async def _edit(self, digest: Digest, text: str, keyboard: Optional[InlineKeyboardMarkup]):
+        """Изменить сводное сообщение (без ошибки, если содержимое не изменилось)."""
+        try:
+            await telegram_sender.edit_message_text(
+                digest.chat_id,
+                digest.message_id,
+                text,
+                reply_markup=keyboard,
+                parse_mode="HTML",
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.error(f"Ошибка обновления сводного сообщения за {digest.day}: {e}")
+
+    async def _on_sent(self, messages: list[OutboxMessage]):
+        """Запомнить ID отправленной сводки и дорисовать изменения, пока она была в очереди."""
+        for message in messages:
+            if not message.idempotency_key.startswith(_DIGEST_KEY_PREFIX):
+                continue
+
+            # Ключ — «digest:дата:чат»
+            day_str, _ = message.idempotency_key[len(_DIGEST_KEY_PREFIX):].split(":")
+            day = date.fromisoformat(day_str)
+            await db.set_digest_message_id(day, message.chat_id, message.message_id)
+
+            digest = Digest(day=day, chat_id=message.chat_id, message_id=message.message_id)
+            text, keyboard = await self.render(day)
+            if text != message.text:
+                await self._edit(digest, text, keyboard)
+
+
+def _choose_page(
+    items: list[tuple[Plant, Notification]], page: Optional[int], after_plant: Optional[str]
+) -> int:
+    """Выбрать растение для клавиатуры: заданное, следующее неотвеченное или первое неотвеченное."""
+    if page is not None:
+        return page % len(items)
+
+    start = 0
+    if after_plant is not None:
+        for index, (plant, _) in enumerate(items):
+            if plant.id == after_plant:
+                start = index
+    for shift in range(len(items)):
+        index = (start + shift) % len(items)
+        if items[index][1].status in _OPEN_STATUSES:
+            return index
+    return start
+
+
+async def _format_item(plant: Plant, notification: Notification) -> str:
+    """Строка сводки для одного уведомления."""
+    if notification.status == NotificationStatus.ANSWERED:
+        label = _ANSWER_LABELS.get(notification.answer, notification.answer)
+        return f"✅ {plant.name} — {label}"
+    if notification.status == NotificationStatus.RESCHEDULED:
+        return f"⏭ {plant.name} — перенесено на завтра"
+
+    reminded = "⏰ " if notification.status == NotificationStatus.REMINDED else ""
+    if notification.notification_type == NotificationType.CHECK:
+        return f"{reminded}🌱 {plant.name} — проверить почву"
+
+    status = await plant_service.get_status(plant.id)
+    if status and status.overdue_days >= 2:
+        return (
+            f"{reminded}‼️🚿 <b>{plant.name}</b> — срочно полить "
+            f"({status.overdue_days} дн. без полива)"
+        )
+    return f"{reminded}🚿 {plant.name} — полить"
+
+
+# Глобальный экземпляр
+digest_service = DigestService()
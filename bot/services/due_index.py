@@ -0,0 +1,88 @@
+"""Индекс сроков проверки растений."""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Iterator, Optional
+
+
+class DueIndex:
+    """
+    Календарь сроков: дата -> растения, у которых на неё назначена проверка.
+
+    Выборка «что пора проверить» проходит только по корзинам до нужной даты,
+    поэтому стоит O(log дней + найденные растения), а не O(весь каталог).
+    """
+
+    def __init__(self):
+        self._due: dict[str, date] = {}  # plant_id -> дата проверки
+        self._buckets: dict[date, set[str]] = {}  # дата -> plant_id
+        self._days: list[date] = []  # отсортированные даты непустых корзин
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __iter__(self) -> Iterator[tuple[date, str]]:
+        """(дата, plant_id) по возрастанию даты — ближайшие проверки первыми."""
+        return self._iter_range(None, None)
+
+    def get(self, plant_id: str) -> Optional[date]:
+        """Дата проверки растения (None, если растения нет в индексе)."""
+        return self._due.get(plant_id)
+
+    def count(self, day: date) -> int:
+        """Сколько проверок назначено на дату."""
+        bucket = self._buckets.get(day)
+        return len(bucket) if bucket else 0
+
+    def clear(self):
+        """Очистить индекс."""
+        self._due.clear()
+        self._buckets.clear()
+        self._days.clear()
+
+    def set(self, plant_id: str, due: date):
+        """Назначить растению дату проверки (или перенести её)."""
+        current = self._due.get(plant_id)
+        if current == due:
+            return
+        if current is not None:
+            self._remove_from_bucket(plant_id, current)
+
+        self._due[plant_id] = due
+        bucket = self._buckets.get(due)
+        if bucket is None:
+            bucket = self._buckets[due] = set()
+            insort(self._days, due)
+        bucket.add(plant_id)
+
+    def discard(self, plant_id: str):
+        """Убрать растение из индекса."""
+        current = self._due.pop(plant_id, None)
+        if current is not None:
+            self._remove_from_bucket(plant_id, current)
+
+    def due_until(self, day: date) -> list[str]:
+        """Растения с проверкой не позже указанной даты (сначала самые просроченные)."""
+        return [plant_id for _, plant_id in self._iter_range(None, day)]
+
+    def due_between(self, start: date, end: date) -> list[tuple[date, str]]:
+        """(дата, plant_id) для проверок в диапазоне [start, end] по возрастанию даты."""
+        return list(self._iter_range(start, end))
+
+    def _iter_range(
+        self, start: Optional[date], end: Optional[date]
+    ) -> Iterator[tuple[date, str]]:
+        """Обойти корзины в диапазоне дат (None — без ограничения)."""
+        lo = 0 if start is None else bisect_left(self._days, start)
+        hi = len(self._days) if end is None else bisect_right(self._days, end)
+        for day in self._days[lo:hi]:
+            for plant_id in sorted(self._buckets[day]):
+                yield day, plant_id
+
+    def _remove_from_bucket(self, plant_id: str, day: date):
+        """Убрать растение из корзины даты, пустую корзину удалить."""
+        bucket = self._buckets[day]
+        bucket.discard(plant_id)
+        if not bucket:
+            del self._buckets[day]
+            del self._days[bisect_left(self._days, day)]
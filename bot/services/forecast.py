@@ -0,0 +1,228 @@
+"""Прогноз проверок и поливов по всему каталогу на несколько дней вперёд."""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+
+from bot.database.models import (
+    NotificationType,
+    Plant,
+    PlantStatus,
+    SoilMoisture,
+    WateringPreference,
+)
+
+# Виды событий в массивах прогноза
+_CHECK = 0
+_WATER = 1
+
+_EVENT_TYPES = (NotificationType.CHECK, NotificationType.WATER)
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerProbabilities:
+    """Вероятности ответов на проверку (very_wet + slightly_wet + dry = 1)."""
+
+    very_wet: float = 0.3
+    slightly_wet: float = 0.4
+    dry: float = 0.3
+    ignore: float = 0.0  # вероятность не ответить (на проверку или полив) — перенос на завтра
+
+    def __post_init__(self):
+        total = self.very_wet + self.slightly_wet + self.dry
+        if not np.isclose(total, 1.0):
+            raise ValueError(f"Сумма вероятностей ответов должна быть 1, а не {total}")
+        if not 0.0 <= self.ignore < 1.0:
+            raise ValueError(f"Вероятность игнора должна быть в [0, 1), а не {self.ignore}")
+
+
+@dataclass(frozen=True, slots=True)
+class Forecast:
+    """Результат прогноза."""
+
+    start: date
+    days: int
+    check_counts: np.ndarray  # (days,) — ожидаемое число проверок по дням
+    water_counts: np.ndarray  # (days,) — ожидаемое число поливов по дням
+    plant_ids: tuple[str, ...]
+    _plant_index: dict[str, int]
+    # События первого прогона, отсортированные по растению и дню
+    _event_plants: np.ndarray
+    _event_days: np.ndarray
+    _event_kinds: np.ndarray
+
+    def daily_counts(self) -> list[tuple[date, float, float]]:
+        """[(дата, проверок, поливов), ...] на каждый день периода."""
+        return [
+            (self.start + timedelta(days=day), float(checks), float(waterings))
+            for day, (checks, waterings) in enumerate(zip(self.check_counts, self.water_counts))
+        ]
+
+    def events_for(self, plant_id: str) -> list[tuple[date, NotificationType]]:
+        """События одного растения: [(дата, тип), ...] по возрастанию даты."""
+        index = self._plant_index.get(plant_id)
+        if index is None:
+            return []
+
+        lo, hi = np.searchsorted(self._event_plants, [index, index + 1])
+        return [
+            (self.start + timedelta(days=int(day)), _EVENT_TYPES[kind])
+            for day, kind in zip(self._event_days[lo:hi], self._event_kinds[lo:hi])
+        ]
+
+
+def build_forecast(
+    plants: list[Plant],
+    statuses: dict[str, PlantStatus],
+    start: date,
+    days: int,
+    probabilities: AnswerProbabilities = AnswerProbabilities(),
+    runs: int = 1,
+    seed: Optional[int] = None,
+) -> Forecast:
+    """
+    Смоделировать проверки и поливы всех растений на days дней начиная со start.
+
+    Правила те же, что в PlantService.calculate_next_check_date:
+    очень влажная / слегка влажная — следующая проверка через wet/moist интервал,
+    сухая — полив сегодня (недополить) или завтра (пересушить), после полива —
+    проверка через check_interval. Без ответа событие переносится на завтра.
+
+    Состояние всех растений — массивы NumPy, цикл идёт только по дням.
+    При runs > 1 прогоны считаются одновременно, счётчики по дням усредняются,
+    а события по растениям берутся из первого прогона.
+    """
+    n = len(plants)
+    rng = np.random.default_rng(seed)
+
+    # Параметры растений, повторённые для каждого прогона
+    def per_plant(values: list[int]) -> np.ndarray:
+        return np.tile(np.array(values, dtype=np.int32), runs)
+
+    check_interval = per_plant([p.check_interval_days for p in plants])
+    wet_interval = per_plant([p.wet_interval_days for p in plants])
+    moist_interval = per_plant([p.moist_interval_days for p in plants])
+    # Через сколько дней после «сухая» поливать: недополить — сегодня, пересушить — завтра
+    dry_delay = per_plant(
+        [0 if p.preference == WateringPreference.OVERWATER else 1 for p in plants]
+    )
+
+    # Начальное состояние: день следующего события (смещение от start) и его вид
+    next_day = np.zeros(n, dtype=np.int32)
+    kind = np.full(n, _CHECK, dtype=np.int8)
+    for i, plant in enumerate(plants):
+        status = statuses.get(plant.id)
+        if status is None:
+            continue
+        next_day[i] = max((status.next_check_date - start).days, 0)
+        if status.last_moisture == SoilMoisture.DRY and status.overdue_days > 0:
+            kind[i] = _WATER
+    next_day = np.tile(next_day, runs)
+    kind = np.tile(kind, runs)
+
+    # Пороги для выбора ответа по одному равномерному числу
+    very_wet_edge = probabilities.very_wet
+    slightly_wet_edge = very_wet_edge + probabilities.slightly_wet
+
+    check_counts = np.zeros(days, dtype=np.float64)
+    water_counts = np.zeros(days, dtype=np.float64)
+    event_plants: list[np.ndarray] = []
+    event_days: list[np.ndarray] = []
+    event_kinds: list[np.ndarray] = []
+
+    for day in range(days):
+        due = np.flatnonzero(next_day == day)
+        if due.size == 0:
+            continue
+
+        due_kind = kind[due]
+        is_water = due_kind == _WATER
+        water_counts[day] = np.count_nonzero(is_water)
+        check_counts[day] = due.size - water_counts[day]
+
+        _record_events(event_plants, event_days, event_kinds, due, due_kind, day, n)
+
+        ignored = rng.random(due.size) < probabilities.ignore
+        answer = rng.random(due.size)
+        is_dry = ~is_water & ~ignored & (answer >= slightly_wet_edge)
+
+        # Проверка: интервал по ответу, «сухая» превращается в полив
+        new_day = np.where(
+            answer < very_wet_edge,
+            day + wet_interval[due],
+            np.where(
+                answer < slightly_wet_edge,
+                day + moist_interval[due],
+                day + dry_delay[due],
+            ),
+        )
+        new_kind = np.where(answer >= slightly_wet_edge, _WATER, _CHECK).astype(np.int8)
+
+        # «Сухая» у растений «лучше недополить» — полив в тот же день
+        same_day_water = is_dry & (dry_delay[due] == 0)
+        if same_day_water.any():
+            watered = due[same_day_water]
+            water_counts[day] += watered.size
+            _record_events(
+                event_plants,
+                event_days,
+                event_kinds,
+                watered,
+                np.full(watered.size, _WATER, dtype=np.int8),
+                day,
+                n,
+            )
+
+        # Полив: следующая проверка через check_interval
+        watered_now = is_water | same_day_water
+        new_day = np.where(watered_now, day + check_interval[due], new_day)
+        new_kind = np.where(watered_now, _CHECK, new_kind).astype(np.int8)
+
+        # Без ответа — то же событие завтра
+        new_day = np.where(ignored, day + 1, new_day)
+        new_kind = np.where(ignored, due_kind, new_kind).astype(np.int8)
+
+        next_day[due] = new_day
+        kind[due] = new_kind
+
+    if event_plants:
+        plants_arr = np.concatenate(event_plants)
+        days_arr = np.concatenate(event_days)
+        kinds_arr = np.concatenate(event_kinds)
+        # Стабильная сортировка по растению сохраняет порядок дней
+        order = np.argsort(plants_arr, kind="stable")
+        plants_arr, days_arr, kinds_arr = plants_arr[order], days_arr[order], kinds_arr[order]
+    else:
+        plants_arr = np.zeros(0, dtype=np.intp)
+        days_arr = np.zeros(0, dtype=np.int32)
+        kinds_arr = np.zeros(0, dtype=np.int8)
+
+    return Forecast(
+        start=start,
+        days=days,
+        check_counts=check_counts / runs,
+        water_counts=water_counts / runs,
+        plant_ids=tuple(p.id for p in plants),
+        _plant_index={p.id: i for i, p in enumerate(plants)},
+        _event_plants=plants_arr,
+        _event_days=days_arr,
+        _event_kinds=kinds_arr,
+    )
+
+
+def _record_events(
+    event_plants: list[np.ndarray],
+    event_days: list[np.ndarray],
+    event_kinds: list[np.ndarray],
+    indices: np.ndarray,
+    kinds: np.ndarray,
+    day: int,
+    n: int,
+):
+    """Запомнить события первого прогона (индексы < n) за день."""
+    first_run = indices < n
+    event_plants.append(indices[first_run])
+    event_days.append(np.full(np.count_nonzero(first_run), day, dtype=np.int32))
+    event_kinds.append(kinds[first_run])
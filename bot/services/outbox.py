@@ -0,0 +1,236 @@
+"""Очередь исходящих сообщений в SQLite и её обработчик."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.config import settings
+from bot.database.models import Notification, OutboxMessage
+from bot.database.repository import db
+from bot.services.sender import telegram_sender
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых повтор бесполезен: неверный запрос или бот заблокирован
+_PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError)
+
+
+class Outbox:
+    """
+    Надёжная отправка сообщений.
+
+    Сообщение сначала записывается в таблицу outbox с ключом идемпотентности
+    (повторная постановка с тем же ключом ничего не делает), затем фоновая задача
+    забирает пачку готовых к отправке сообщений, отправляет их через telegram_sender
+    и записывает message_id в уведомление. Неудачные попытки повторяются
+    с экспоненциальной задержкой; неотправленное переживает перезапуск бота.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._sent_hooks: list[Callable[[list[OutboxMessage]], Awaitable[None]]] = []
+
+    def add_sent_hook(self, hook: Callable[[list[OutboxMessage]], Awaitable[None]]):
+        """Зарегистрировать обработчик, вызываемый после отправки каждой пачки."""
+        self._sent_hooks.append(hook)
+
+    async def enqueue(
+        self,
+        key: str,
+        chat_id: int,
+        text: str,
+        reply_markup: InlineKeyboardMarkup = None,
+        priority: int = 0,
+    ) -> bool:
+        """
+        Поставить сообщение в очередь.
+
+        Сообщения с меньшим priority отправляются раньше.
+
+        Returns:
+            bool: False, если сообщение с таким ключом уже ставилось
+        """
+        outbox_id = await db.enqueue_outbox(
+            _outbox_message(key, chat_id, text, reply_markup, priority)
+        )
+        if outbox_id is None:
+            return False
+        self.wake()
+        return True
+
+    async def enqueue_notification(
+        self,
+        key: str,
+        notification: Notification,
+        chat_id: int,
+        text: str,
+        reply_markup: InlineKeyboardMarkup = None,
+        priority: int = 0,
+    ) -> bool:
+        """
+        Создать уведомление и поставить его сообщение в очередь одной транзакцией.
+
+        message_id уведомления будет записан после отправки.
+
+        Returns:
+            bool: False, если сообщение с таким ключом уже ставилось (уведомление не создаётся)
+        """
+        async with db.transaction():
+            outbox_id = await db.enqueue_outbox(
+                _outbox_message(key, chat_id, text, reply_markup, priority)
+            )
+            if outbox_id is None:
+                return False
+            notification.id = await db.create_notification(notification)
+            await db.set_outbox_notification(outbox_id, notification.id)
+
+        self.wake()
+        return True
+
+    def wake(self):
+        """Разбудить обработчик очереди."""
+        self._wakeup.set()
+
+    def start(self):
+        """Запустить фоновую обработку очереди."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить фоновую обработку (неотправленное останется в очереди)."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        """Цикл обработки: пачка за пачкой, между ними — ожидание новых сообщений или повторов."""
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.process_due()
+            except Exception as e:
+                logger.error(f"Ошибка обработки очереди сообщений: {e}")
+                processed = 0
+
+            # Полная пачка — возможно, готово ещё
+            if processed >= settings.outbox_batch_size:
+                continue
+
+            timeout = settings.outbox_poll_seconds
+            next_attempt = await db.get_next_outbox_attempt()
+            if next_attempt is not None:
+                timeout = min(timeout, max((next_attempt - datetime.now()).total_seconds(), 0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process_due(self) -> int:
+        """
+        Отправить одну пачку готовых сообщений.
+
+        Returns:
+            int: сколько сообщений обработано (отправлено или отложено)
+        """
+        messages = await db.get_due_outbox(datetime.now(), settings.outbox_batch_size)
+        if not messages:
+            return 0
+
+        results = await asyncio.gather(*(self._deliver(message) for message in messages))
+        sent = [message for message, ok in zip(messages, results) if ok]
+
+        if sent:
+            for hook in self._sent_hooks:
+                try:
+                    await hook(sent)
+                except Exception as e:
+                    logger.error(f"Ошибка обработчика отправленных сообщений: {e}")
+
+        logger.info(f"Очередь сообщений: отправлено {len(sent)} из {len(messages)}")
+        return len(messages)
+
+    async def _deliver(self, message: OutboxMessage) -> bool:
+        """Отправить сообщение и записать результат попытки."""
+        reply_markup = None
+        if message.reply_markup:
+            reply_markup = InlineKeyboardMarkup.model_validate_json(message.reply_markup)
+
+        try:
+            sent = await telegram_sender.send_message(
+                message.chat_id,
+                message.text,
+                reply_markup=reply_markup,
+                parse_mode="HTML",
+            )
+        except Exception as e:
+            attempts = message.attempts + 1
+            if isinstance(e, _PERMANENT_ERRORS) or attempts >= settings.outbox_max_attempts:
+                next_attempt = None
+                logger.error(f"Сообщение {message.idempotency_key} не отправлено: {e}")
+            else:
+                if isinstance(e, TelegramRetryAfter):
+                    delay = e.retry_after
+                else:
+                    delay = min(
+                        settings.outbox_backoff_seconds * 2 ** (attempts - 1),
+                        settings.outbox_max_backoff_seconds,
+                    )
+                next_attempt = datetime.now() + timedelta(seconds=delay)
+                logger.warning(
+                    f"Сообщение {message.idempotency_key}: попытка {attempts} не удалась ({e}), "
+                    f"повтор через {delay} с"
+                )
+            await db.mark_outbox_failed(message.id, str(e), next_attempt)
+            return False
+
+        # Telegram сообщение уже принял: запись отправки не должна зависеть от уведомления,
+        # иначе повтор отправит его ещё раз
+        await db.mark_outbox_sent(message, sent.message_id)
+        message.message_id = sent.message_id
+        if message.notification_id is not None:
+            try:
+                await db.update_notification_message_id(
+                    message.notification_id, message.chat_id, sent.message_id
+                )
+            except Exception as e:
+                logger.error(
+                    f"Сообщение {message.idempotency_key}: не удалось записать message_id "
+                    f"в уведомление {message.notification_id}: {e}"
+                )
+        return True
+
+
+def _outbox_message(
+    key: str,
+    chat_id: int,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup],
+    priority: int = 0,
+) -> OutboxMessage:
+    """Собрать запись очереди (клавиатура хранится как JSON)."""
+    return OutboxMessage(
+        id=None,
+        idempotency_key=key,
+        chat_id=chat_id,
+        text=text,
+        reply_markup=reply_markup.model_dump_json(exclude_none=True) if reply_markup else None,
+        priority=priority,
+    )
+
+
+# Глобальный экземпляр
+outbox = Outbox()
@@ -2,13 +2,13 @@
 
 import json
 import logging
+from dataclasses import replace
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
 from bot.config import settings
 from bot.database.models import (
-    NotificationStatus,
     NotificationType,
     Plant,
     PlantStatus,
@@ -16,6 +16,8 @@ from bot.database.models import (
     WateringPreference,
 )
 from bot.database.repository import db
+from bot.services.due_index import DueIndex
+from bot.services.forecast import AnswerProbabilities, Forecast, build_forecast
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,19 @@ class PlantService:
         self._plants: dict[str, Plant] = {}
         self._loaded = False
 
+        # Write-through кэш статусов: статусы меняются только через сервис,
+        # поэтому читаем их из БД один раз, а каждую запись дублируем в кэш
+        self._statuses: dict[str, PlantStatus] = {}
+        self._statuses_loaded = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Индекс сроков проверки поверх кэша: «что пора» без обхода каталога
+        self._due_index = DueIndex()
+
+        # Если транзакция откатилась, в кэше могли остаться незафиксированные статусы
+        db.add_rollback_hook(self.invalidate_statuses)
+
     def _load_plants(self):
         """Загрузить профили растений из JSON."""
         if self._loaded:
@@ -54,6 +69,7 @@ class PlantService:
                 moist_interval_days=plant_data["moist_interval_days"],
                 preference=WateringPreference(plant_data["preference"]),
                 notes=plant_data.get("notes"),
+                schedule_tolerance_days=plant_data.get("schedule_tolerance_days", 0),
             )
             self._plants[plant.id] = plant
 
@@ -80,34 +96,141 @@ class PlantService:
         """Получить путь к фото растения."""
         return settings.base_dir / plant.photo
 
+    async def load_statuses(self):
+        """Загрузить все статусы в кэш (при старте или после инвалидации)."""
+        statuses = await db.get_all_plant_statuses()
+        self._statuses = {}
+        self._due_index.clear()
+        for status in statuses:
+            self._cache_status(status)
+        self._statuses_loaded = True
+        logger.info(f"Загружено {len(self._statuses)} статусов растений в кэш")
+
+    def invalidate_statuses(self, plant_id: str = None):
+        """Сбросить кэш статусов: одного растения или целиком."""
+        if plant_id is None:
+            self._statuses = {}
+            self._due_index.clear()
+            self._statuses_loaded = False
+        else:
+            self._statuses.pop(plant_id, None)
+            self._due_index.discard(plant_id)
+
+    async def _ensure_statuses(self):
+        """Загрузить кэш статусов, если он ещё не загружен или был сброшен."""
+        if not self._statuses_loaded:
+            await self.load_statuses()
+
+    def _cache_status(self, status: PlantStatus):
+        """Положить статус в кэш и в индекс сроков."""
+        self._statuses[status.plant_id] = status
+        self._due_index.set(status.plant_id, status.next_check_date)
+
+    def get_cache_stats(self) -> dict[str, int]:
+        """Статистика кэша статусов."""
+        return {
+            "size": len(self._statuses),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+        }
+
+    async def get_status(self, plant_id: str) -> Optional[PlantStatus]:
+        """Получить статус растения (из кэша, при промахе — из БД)."""
+        # После полной загрузки отсутствие в кэше означает отсутствие в БД
+        if plant_id in self._statuses or self._statuses_loaded:
+            self.cache_hits += 1
+            return self._statuses.get(plant_id)
+
+        self.cache_misses += 1
+        status = await db.get_plant_status(plant_id)
+        if status is not None:
+            self._cache_status(status)
+        return status
+
+    async def _save_status(self, status: PlantStatus):
+        """Записать статус в БД и в кэш."""
+        await db.upsert_plant_status(status)
+        self._cache_status(status)
+
     async def get_or_create_status(self, plant_id: str) -> PlantStatus:
         """Получить или создать статус растения."""
-        status = await db.get_plant_status(plant_id)
+        status = await self.get_status(plant_id)
         if status is None:
-            # Создаём начальный статус — проверка сегодня
-            status = PlantStatus(
-                plant_id=plant_id,
-                last_moisture=SoilMoisture.DRY,
-                last_check_date=date.today(),
-                next_check_date=date.today(),
-                overdue_days=0,
-            )
-            await db.upsert_plant_status(status)
+            await self._ensure_statuses()
+            status = self._initial_status(plant_id, date.today())
+            await self._save_status(status)
         return status
 
+    def _initial_status(self, plant_id: str, today: date) -> PlantStatus:
+        """Начальный статус нового растения — проверка сегодня (или в свободный день окна)."""
+        next_check = today
+        plant = self._plants.get(plant_id)
+        if plant is not None:
+            next_check = self._level_check_date(plant, today, earliest=today)
+
+        return PlantStatus(
+            plant_id=plant_id,
+            last_moisture=SoilMoisture.DRY,
+            last_check_date=today,
+            next_check_date=next_check,
+            overdue_days=0,
+        )
+
+    def _level_check_date(self, plant: Plant, target: date, earliest: date) -> date:
+        """
+        Выровнять дату проверки по нагрузке.
+
+        Проверку можно сдвинуть на schedule_tolerance_days растения в обе стороны
+        (растения «лучше недополить» — только раньше), но не раньше earliest.
+        Выбирается день с наименьшим числом уже назначенных проверок,
+        при равенстве — ближайший к исходной дате, затем более ранний.
+        """
+        tolerance = plant.schedule_tolerance_days
+        if not settings.schedule_leveling or tolerance <= 0:
+            return target
+
+        first = max(target - timedelta(days=tolerance), earliest)
+        if plant.preference == WateringPreference.OVERWATER:
+            last = target
+        else:
+            last = target + timedelta(days=tolerance)
+        if first >= last:
+            return target
+
+        current = self._due_index.get(plant.id)
+
+        def load(day: date) -> int:
+            # Текущая дата самого растения освободится при переносе
+            return self._due_index.count(day) - (day == current)
+
+        candidates = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        return min(
+            candidates,
+            key=lambda day: (load(day), abs((day - target).days), day),
+        )
+
     async def calculate_next_check_date(
         self, plant: Plant, moisture: SoilMoisture
     ) -> date:
         """Рассчитать следующую дату проверки."""
         today = date.today()
+        tomorrow = today + timedelta(days=1)
 
         if moisture == SoilMoisture.WATERED:
-            return today + timedelta(days=plant.check_interval_days)
+            interval = plant.check_interval_days
         elif moisture == SoilMoisture.VERY_WET:
-            return today + timedelta(days=plant.wet_interval_days)
+            interval = plant.wet_interval_days
         elif moisture == SoilMoisture.SLIGHTLY_WET:
-            return today + timedelta(days=plant.moist_interval_days)
-        else:  # DRY
+            interval = plant.moist_interval_days
+        else:
+            interval = None
+
+        if interval is not None:
+            await self._ensure_statuses()
+            return self._level_check_date(
+                plant, today + timedelta(days=interval), earliest=tomorrow
+            )
+        else:  # DRY — это полив, его не сдвигаем
             if plant.preference == WateringPreference.UNDERWATER:
                 # Лучше пересушить — напоминаем завтра
                 return today + timedelta(days=1)
@@ -138,7 +261,7 @@ class PlantService:
             next_check_date=next_check,
             overdue_days=0,  # Сбрасываем при ответе
         )
-        await db.upsert_plant_status(status)
+        await self._save_status(status)
 
         # Формируем сообщение
         message = None
@@ -156,7 +279,7 @@ class PlantService:
         if not plant:
             raise ValueError(f"Plant {plant_id} not found")
 
-        next_check = date.today() + timedelta(days=plant.check_interval_days)
+        next_check = await self.calculate_next_check_date(plant, SoilMoisture.WATERED)
 
         status = PlantStatus(
             plant_id=plant_id,
@@ -165,8 +288,7 @@ class PlantService:
             next_check_date=next_check,
             overdue_days=0,
         )
-        await db.upsert_plant_status(status)
-        await db.reset_overdue_days(plant_id)
+        await self._save_status(status)
 
         return next_check
 
@@ -182,48 +304,139 @@ class PlantService:
         self._load_plants()
         today = date.today()
 
+        await self._ensure_statuses()
+
+        # Создаём начальные статусы для новых растений одной пачкой.
+        # Каждый статус сразу попадает в индекс, чтобы выравнивание следующих
+        # учитывало уже распределённые проверки
+        missing = []
+        for plant_id in self._plants:
+            if plant_id not in self._statuses:
+                status = self._initial_status(plant_id, today)
+                self._cache_status(status)
+                missing.append(status)
+        try:
+            await db.insert_plant_statuses(missing)
+        except BaseException:
+            for status in missing:
+                self.invalidate_statuses(status.plant_id)
+            raise
+
         to_check = []
         to_water = []
 
-        for plant in self._plants.values():
-            status = await self.get_or_create_status(plant.id)
-
-            if status.next_check_date <= today:
-                # Проверяем, нужен ли полив
-                if (
-                    status.last_moisture == SoilMoisture.DRY
-                    and status.overdue_days > 0
-                ):
-                    to_water.append((plant, status))
-                else:
-                    to_check.append((plant, status))
+        for plant_id in self._due_index.due_until(today):
+            plant = self._plants.get(plant_id)
+            if plant is None:
+                # Статус остался от растения, удалённого из каталога
+                continue
+            status = self._statuses[plant_id]
+
+            # Проверяем, нужен ли полив
+            if (
+                status.last_moisture == SoilMoisture.DRY
+                and status.overdue_days > 0
+            ):
+                to_water.append((plant, status))
+            else:
+                to_check.append((plant, status))
 
         return to_check, to_water
 
-    async def reschedule_unanswered(self):
-        """Перенести неотвеченные уведомления на завтра."""
-        today = date.today()
-        tomorrow = today + timedelta(days=1)
+    async def get_due_schedule(
+        self, start: date = None, days: int = 7
+    ) -> list[tuple[date, list[Plant]]]:
+        """
+        Проверки по дням на период (по умолчанию — неделя с сегодняшнего дня).
+
+        Returns:
+            list: [(дата, [растения]), ...] только для дней, на которые что-то назначено
+        """
+        self._load_plants()
+        await self._ensure_statuses()
+        if start is None:
+            start = date.today()
+
+        schedule: dict[date, list[Plant]] = {}
+        end = start + timedelta(days=days - 1)
+        for day, plant_id in self._due_index.due_between(start, end):
+            plant = self._plants.get(plant_id)
+            if plant is not None:
+                schedule.setdefault(day, []).append(plant)
+        return list(schedule.items())
+
+    async def get_next_due(self) -> Optional[tuple[Plant, date]]:
+        """Ближайшее растение, которое нужно проверить, и дата проверки."""
+        self._load_plants()
+        await self._ensure_statuses()
 
-        pending = await db.get_pending_notifications(today)
+        for day, plant_id in self._due_index:
+            plant = self._plants.get(plant_id)
+            if plant is not None:
+                return plant, day
+        return None
 
-        for notification in pending:
-            # Обновляем статус уведомления
-            await db.update_notification(
-                notification.id, NotificationStatus.RESCHEDULED
+    async def get_forecast(
+        self,
+        days: int = 30,
+        probabilities: AnswerProbabilities = None,
+        runs: int = 1,
+        seed: int = None,
+    ) -> Forecast:
+        """
+        Прогноз проверок и поливов всего каталога на days дней с сегодняшнего дня.
+
+        Args:
+            days: Длина периода
+            probabilities: Вероятности ответов (по умолчанию AnswerProbabilities())
+            runs: Число прогонов для усреднения счётчиков по дням
+            seed: Зерно генератора для воспроизводимого прогноза
+        """
+        self._load_plants()
+        await self._ensure_statuses()
+
+        return build_forecast(
+            list(self._plants.values()),
+            self._statuses,
+            date.today(),
+            days,
+            probabilities or AnswerProbabilities(),
+            runs=runs,
+            seed=seed,
+        )
+
+    async def reschedule_unanswered(self, for_date: date = None) -> tuple[int, int]:
+        """
+        Перенести неотвеченные уведомления дня (по умолчанию сегодняшнего) на следующий день.
+
+        Returns:
+            tuple[int, int]: (перенесено уведомлений, растений с увеличенным счётчиком игнора)
+        """
+        if for_date is None:
+            for_date = date.today()
+        tomorrow = for_date + timedelta(days=1)
+
+        rescheduled = await db.reschedule_pending_notifications(for_date, tomorrow)
+
+        # БД уже обновлена пачкой — повторяем те же изменения в кэше.
+        # Статусы заменяются копиями: выданные раньше объекты не меняются,
+        # а при откате внешней транзакции кэш целиком сбросит rollback-хук
+        overdue_ids = {
+            plant_id
+            for plant_id, notification_type in rescheduled
+            if notification_type == NotificationType.WATER
+        }
+        now = datetime.now()
+        for plant_id in {plant_id for plant_id, _ in rescheduled}:
+            status = self._statuses.get(plant_id)
+            if status is None:
+                continue
+            overdue_days = status.overdue_days + (1 if plant_id in overdue_ids else 0)
+            self._cache_status(
+                replace(status, overdue_days=overdue_days, next_check_date=tomorrow, updated_at=now)
             )
 
-            # Обновляем дату следующей проверки
-            status = await db.get_plant_status(notification.plant_id)
-            if status:
-                # Увеличиваем счётчик игнора для уведомлений о поливе
-                if notification.notification_type == NotificationType.WATER:
-                    await db.increment_overdue_days(notification.plant_id)
-
-                # Переносим на завтра
-                status.next_check_date = tomorrow
-                status.updated_at = datetime.now()
-                await db.upsert_plant_status(status)
+        return len(rescheduled), len(overdue_ids)
 
 
 # Глобальный экземпляр
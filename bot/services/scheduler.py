@@ -1,8 +1,10 @@
 """Планировщик уведомлений."""
 
+import functools
 import logging
-from datetime import datetime
-from typing import TYPE_CHECKING
+import time
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Awaitable, Callable
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -13,17 +15,43 @@ from bot.database.models import (
     Notification,
     NotificationStatus,
     NotificationType,
+    OutboxMessage,
+    Plant,
+    PlantStatus,
+    UserSettings,
+    WateringPreference,
 )
 from bot.database.repository import db
 from bot.services.plant_service import plant_service
+from bot.services.digest import digest_service
+from bot.services.outbox import outbox
+from bot.services.sender import telegram_sender
 from bot.services.sheets import sheets_service
 
 if TYPE_CHECKING:
     from aiogram import Bot
+    from aiogram.types import InlineKeyboardMarkup
 
 logger = logging.getLogger(__name__)
 
 
+# Что делать с запусками, пропущенными пока бот был выключен
+# (значения упорядочены: min() выбирает более строгую политику)
+_CATCH_UP_TODAY = 0  # последний, если он был сегодня
+_CATCH_UP_LAST = 1  # только последний
+_CATCH_UP_ALL = 2  # каждый (не дальше job_catch_up_days)
+
+
+def _fire_times(trigger: CronTrigger, since: datetime, until: datetime) -> list[datetime]:
+    """Срабатывания триггера в интервале (since, until]."""
+    times = []
+    fire_time = trigger.get_next_fire_time(None, since + timedelta(seconds=1))
+    while fire_time is not None and fire_time <= until:
+        times.append(fire_time)
+        fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(seconds=1))
+    return times
+
+
 def _parse_time(time_str: str) -> tuple[int, int]:
     """Безопасный парсинг времени HH:MM."""
     parts = time_str.split(":")
@@ -33,213 +61,520 @@ def _parse_time(time_str: str) -> tuple[int, int]:
     return int(parts[0]), 0
 
 
+def _normalize_time(time_str: str) -> str:
+    """Привести время к виду HH:MM (ключ корзины), ValueError — если это не время."""
+    hour, minute = _parse_time(time_str.strip())
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Неверное время: {time_str}")
+    return f"{hour:02d}:{minute:02d}"
+
+
+# С какого счётчика игнора полив срочный (‼️ в сообщении и первым в очереди)
+_URGENT_OVERDUE_DAYS = 2
+
+# Ключи сообщений ежедневной рассылки в очереди: только они отмечаются в таблице
+# как отправленные (уведомления из обработчиков кнопок идут с другими ключами)
+_DAILY_KEY_PREFIX = "daily:"
+
+# Приоритет ежедневных уведомлений в очереди отправки (меньше — раньше)
+_PRIORITY_OVERDUE_WATER = 0  # срочный полив (‼️)
+_PRIORITY_OVERWATER_WATER = 1  # сухая почва у растения «лучше перелить»
+_PRIORITY_WATER = 2
+_PRIORITY_CHECK = 3
+
+
+def _notification_priority(
+    plant: Plant, notification_type: NotificationType, status: PlantStatus
+) -> int:
+    """Приоритет: сначала срочные поливы, потом поливы «перелить», потом остальные, проверки."""
+    if notification_type == NotificationType.CHECK:
+        return _PRIORITY_CHECK
+    if status is not None and status.overdue_days >= _URGENT_OVERDUE_DAYS:
+        return _PRIORITY_OVERDUE_WATER
+    if plant.preference == WateringPreference.OVERWATER:
+        return _PRIORITY_OVERWATER_WATER
+    return _PRIORITY_WATER
+
+
+def _notification_message(
+    plant: Plant, notification_type: NotificationType, status: PlantStatus
+) -> tuple[str, "InlineKeyboardMarkup"]:
+    """Текст и клавиатура ежедневного уведомления о растении."""
+    # Импортируем здесь, чтобы избежать циклического импорта
+    from bot.keyboards.inline import get_moisture_keyboard, get_watering_keyboard
+
+    if notification_type == NotificationType.CHECK:
+        return f"🌱 <b>{plant.name}</b>\n\nКак сегодня почва?", get_moisture_keyboard(plant.id)
+
+    # Добавляем ‼️ если игнор > 2 дней
+    urgent = status is not None and status.overdue_days >= _URGENT_OVERDUE_DAYS
+    emoji = "‼️ " if urgent else ""
+    text = (
+        f"{emoji}🚿 <b>{plant.name}</b>\n\n"
+        f"{'Срочно полей!' if urgent else 'Пожалуйста, полей цветок!'}"
+    )
+    if urgent:
+        text += f"\n\n⚠️ Без полива уже {status.overdue_days} дней"
+    return text, get_watering_keyboard(plant.id)
+
+
 class NotificationScheduler:
     """Планировщик уведомлений о поливе."""
 
     def __init__(self):
         self.scheduler = AsyncIOScheduler(timezone=pytz.timezone(settings.timezone))
         self.bot: "Bot" = None
-        self._notification_job_id = "daily_notifications"
+        self._notification_job_prefix = "daily_notifications:"
         self._reminder_job_id = "daily_reminders"
         self._reschedule_job_id = "daily_reschedule"
+        self._maintenance_job_id = "daily_maintenance"
+
+        # Задачи: id -> (время HH:MM, задача, что делать с пропущенными запусками).
+        # Задачи ежедневных уведомлений добавляются по корзинам времени (см. _add_to_bucket)
+        self._jobs: dict[str, tuple[str, Callable[[date], Awaitable], int]] = {
+            # Напоминания о неотвеченных в 18:00 — догоняем только в тот же день
+            self._reminder_job_id: (
+                settings.reminder_time, self._send_reminders, _CATCH_UP_TODAY
+            ),
+            # Перенос неотвеченных в конце дня (23:59) — каждый пропущенный день
+            self._reschedule_job_id: ("23:59", self._reschedule_unanswered, _CATCH_UP_ALL),
+            # Архивация старых уведомлений и обслуживание БД ночью — один раз
+            self._maintenance_job_id: (
+                settings.maintenance_time, self._run_maintenance, _CATCH_UP_LAST
+            ),
+        }
+
+        # Корзины ежедневных уведомлений: время HH:MM -> получатели.
+        # Одна задача на занятую корзину, а не на пользователя
+        self._time_buckets: dict[str, set[int]] = {}
+        self._user_times: dict[int, str] = {}
+
+        outbox.add_sent_hook(self._on_notifications_sent)
 
     def set_bot(self, bot: "Bot"):
         """Установить экземпляр бота."""
         self.bot = bot
+        telegram_sender.set_bot(bot)
 
-    async def start(self):
-        """Запустить планировщик."""
-        # Парсим фиксированное время из конфига
-        hour, minute = _parse_time(settings.notification_time)
-        reminder_hour, reminder_minute = _parse_time(settings.reminder_time)
-        
-        # Часовой пояс
-        tz = pytz.timezone(settings.timezone)
-
-        # Ежедневные уведомления в 11:00
-        self.scheduler.add_job(
-            self._send_daily_notifications,
-            CronTrigger(hour=hour, minute=minute, timezone=tz),
-            id=self._notification_job_id,
-            replace_existing=True,
-        )
+    def _trigger(self, job_id: str) -> CronTrigger:
+        """Ежедневный триггер задачи."""
+        hour, minute = _parse_time(self._jobs[job_id][0])
+        return CronTrigger(hour=hour, minute=minute, timezone=pytz.timezone(settings.timezone))
 
-        # Напоминания о неотвеченных в 18:00
+    def _schedule_job(self, job_id: str):
+        """Зарегистрировать задачу в APScheduler (или заменить её триггер)."""
         self.scheduler.add_job(
-            self._send_reminders,
-            CronTrigger(hour=reminder_hour, minute=reminder_minute, timezone=tz),
-            id=self._reminder_job_id,
+            self._run_job,
+            self._trigger(job_id),
+            args=[job_id],
+            id=job_id,
             replace_existing=True,
+            # Если цикл событий был занят — запустить с опозданием, но один раз
+            misfire_grace_time=settings.job_misfire_grace_seconds,
+            coalesce=True,
         )
 
-        # Перенос неотвеченных в конце дня (23:59)
-        self.scheduler.add_job(
-            self._reschedule_unanswered,
-            CronTrigger(hour=23, minute=59, timezone=tz),
-            id=self._reschedule_job_id,
-            replace_existing=True,
-        )
+    async def start(self):
+        """Запустить планировщик."""
+        for job_id in self._jobs:
+            self._schedule_job(job_id)
+        await self._load_time_buckets()
 
         self.scheduler.start()
         logger.info(
-            f"Планировщик запущен. Уведомления в {settings.notification_time}, "
+            f"Планировщик запущен. Уведомления в {', '.join(sorted(self._time_buckets))}, "
             f"напоминания в {settings.reminder_time} ({settings.timezone})"
         )
 
+    def _recipients(self) -> list[int]:
+        """Кто получает ежедневные уведомления."""
+        return [settings.active_waterer_id]
+
+    def is_recipient(self, user_id: int) -> bool:
+        """Получает ли пользователь ежедневные уведомления."""
+        return user_id in self._recipients()
+
+    async def _load_time_buckets(self):
+        """Разложить получателей по корзинам времени из user_settings."""
+        user_times = {
+            user_settings.user_id: user_settings.notification_time
+            for user_settings in await db.get_all_user_settings()
+        }
+        for user_id in self._recipients():
+            time_str = user_times.get(user_id, settings.notification_time)
+            try:
+                time_str = _normalize_time(time_str)
+            except ValueError:
+                logger.error(f"Неверное время уведомлений {time_str!r} у {user_id}")
+                time_str = _normalize_time(settings.notification_time)
+            self._add_to_bucket(user_id, time_str)
+
+    def _add_to_bucket(self, user_id: int, time_str: str):
+        """Добавить получателя в корзину; для новой корзины завести задачу."""
+        bucket = self._time_buckets.setdefault(time_str, set())
+        bucket.add(user_id)
+        self._user_times[user_id] = time_str
+        if len(bucket) > 1:
+            return
+
+        job_id = f"{self._notification_job_prefix}{time_str}"
+        # Ежедневные уведомления — догоняем только в тот же день
+        self._jobs[job_id] = (
+            time_str,
+            functools.partial(self._send_bucket_notifications, time_str),
+            _CATCH_UP_TODAY,
+        )
+        self._schedule_job(job_id)
+
+    def _remove_from_bucket(self, user_id: int):
+        """Убрать получателя из его корзины; задачу опустевшей корзины снять."""
+        time_str = self._user_times.pop(user_id, None)
+        if time_str is None:
+            return
+
+        bucket = self._time_buckets[time_str]
+        bucket.discard(user_id)
+        if bucket:
+            return
+
+        del self._time_buckets[time_str]
+        job_id = f"{self._notification_job_prefix}{time_str}"
+        del self._jobs[job_id]
+        if self.scheduler.get_job(job_id):
+            self.scheduler.remove_job(job_id)
+
+    async def set_notification_time(self, user_id: int, time_str: str) -> str:
+        """
+        Сохранить время ежедневных уведомлений пользователя и сразу перенести его в корзину.
+
+        Время сохраняется и для тех, кто сейчас не получатель: оно начнёт действовать,
+        когда пользователь станет активным поливальщиком.
+
+        Returns:
+            str: нормализованное время HH:MM
+
+        Raises:
+            ValueError: если время не в формате HH:MM
+        """
+        time_str = _normalize_time(time_str)
+        await db.upsert_user_settings(UserSettings(user_id=user_id, notification_time=time_str))
+
+        if user_id in self._user_times:
+            self._remove_from_bucket(user_id)
+            self._add_to_bucket(user_id, time_str)
+            logger.info(f"Уведомления для {user_id} перенесены на {time_str}")
+        return time_str
+
+    async def _send_bucket_notifications(self, time_str: str, for_date: date = None):
+        """Ежедневные уведомления всем получателям корзины."""
+        for user_id in sorted(self._time_buckets.get(time_str, ())):
+            await self._send_daily_notifications(for_date, chat_id=user_id)
+
     def stop(self):
         """Остановить планировщик."""
         self.scheduler.shutdown()
 
-    async def run_daily_check(self):
-        """Запустить ежедневную проверку (например, при старте)."""
-        await self._send_daily_notifications()
-
-    async def _send_daily_notifications(self) -> tuple[int, int]:
-        """Отправить ежедневные уведомления."""
+    async def _run_job(self, job_id: str, scheduled_at: datetime = None):
+        """Выполнить задачу и записать запуск в журнал (только если она не упала)."""
+        if scheduled_at is None:
+            scheduled_at = datetime.now()
+        if job_id == self._reminder_job_id:
+            # Напоминание — только о сообщениях, созданных до его времени: при догонянии
+            # уведомления того же дня могли быть разосланы только что
+            await self._send_reminders(scheduled_at.date(), created_before=scheduled_at)
+        else:
+            _, job, _ = self._jobs[job_id]
+            await job(scheduled_at.date())
+        await db.record_job_run(job_id, scheduled_at)
+
+    async def catch_up_missed_jobs(self) -> list[str]:
+        """
+        Выполнить запуски, пропущенные пока бот был выключен (например, при старте).
+
+        Пропуск определяется по журналу job_runs: срабатывания триггера после
+        последнего записанного запуска. Повторный перезапуск ничего не делает.
+
+        Returns:
+            list[str]: id выполненных задач в порядке выполнения
+        """
+        tz = pytz.timezone(settings.timezone)
+        now = datetime.now(tz)
+        oldest = now - timedelta(days=settings.job_catch_up_days)
+        last_runs = await db.get_job_runs()
+
+        missed: list[tuple[datetime, str]] = []
+        for job_id, (_, _, policy) in self._jobs.items():
+            last_run = last_runs.get(job_id)
+            if last_run is None:
+                # Журнала ещё нет — считаем пропущенным только последний запуск
+                since, policy = now - timedelta(days=1), min(policy, _CATCH_UP_LAST)
+            else:
+                since = max(last_run.astimezone(tz), oldest)
+
+            fire_times = _fire_times(self._trigger(job_id), since, now)
+            if policy == _CATCH_UP_TODAY:
+                fire_times = [t for t in fire_times[-1:] if t.date() == now.date()]
+            elif policy == _CATCH_UP_LAST:
+                fire_times = fire_times[-1:]
+            missed.extend((fire_time, job_id) for fire_time in fire_times)
+
+        # В порядке срабатывания: перенос за вчера раньше сегодняшней рассылки
+        done = []
+        for fire_time, job_id in sorted(missed):
+            logger.info(f"Пропущенный запуск {job_id} за {fire_time:%d.%m %H:%M}, выполняем")
+            try:
+                await self._run_job(job_id, fire_time.astimezone().replace(tzinfo=None))
+            except Exception as e:
+                logger.error(f"Ошибка пропущенного запуска {job_id}: {e}")
+                continue
+            done.append(job_id)
+
+        if not done:
+            logger.info("Пропущенных запусков нет")
+        return done
+
+    async def _send_daily_notifications(
+        self, for_date: date = None, chat_id: int = None
+    ) -> tuple[int, int]:
+        """
+        Отправить ежедневные уведомления.
+
+        Рассылка идемпотентна: завершённая рассылка за день в чат записывается
+        в журнал daily_runs и повторно не выполняется, а уже созданные за день
+        уведомления берутся одним запросом и пропускаются. Сообщения ставятся
+        в очередь outbox с ключом «тип:растение:дата» — это защищает и от гонок.
+        Отправляет их обработчик очереди, он же записывает message_id, а отметки
+        в таблице ставит _on_notifications_sent.
+        """
         if not self.bot:
             logger.error("Bot not set")
             return 0, 0
 
+        today = for_date or date.today()
+        chat_id = chat_id or settings.active_waterer_id
+        if await db.is_daily_run_done(today, chat_id):
+            logger.info(f"Уведомления за {today} в чат {chat_id} уже разосланы")
+            return 0, 0
+
         logger.info("Отправка ежедневных уведомлений...")
+        started = time.monotonic()
 
         to_check, to_water = await plant_service.get_plants_for_today()
-        sent_check = 0
-        sent_water = 0
-
-        # Импортируем здесь, чтобы избежать циклического импорта
-        from bot.keyboards.inline import get_moisture_keyboard, get_watering_keyboard
-
-        # Отправляем уведомления о проверке активному поливальщику
-        for plant, status in to_check:
-            # Проверяем, не отправляли ли уже сегодня
-            existing = await db.get_today_notification_for_plant(
-                plant.id, NotificationType.CHECK
-            )
-            if existing:
-                continue
-
-            try:
-                keyboard = get_moisture_keyboard(plant.id)
-                message = await self.bot.send_message(
-                    settings.active_waterer_id,
-                    f"🌱 <b>{plant.name}</b>\n\nКак сегодня почва?",
-                    reply_markup=keyboard,
-                    parse_mode="HTML",
+        notified = await db.get_notified_plants(today)
+
+        # Собираем сообщения, пропуская уже отправленные сегодня, и упорядочиваем
+        # по срочности: при ограниченной скорости отправки срочное уходит первым
+        queue: list[tuple[int, int, int, Plant, NotificationType, PlantStatus]] = []
+        for notification_type, plants in (
+            (NotificationType.CHECK, to_check),
+            (NotificationType.WATER, to_water),
+        ):
+            for plant, status in plants:
+                if (plant.id, notification_type) in notified:
+                    continue
+                priority = _notification_priority(plant, notification_type, status)
+                overdue_days = status.overdue_days if status else 0
+                queue.append(
+                    (priority, -overdue_days, len(queue), plant, notification_type, status)
                 )
-
-                # Сохраняем уведомление
+        queue.sort()
+
+        outgoing: list[tuple[int, Plant, NotificationType, str, "InlineKeyboardMarkup"]] = []
+        for priority, _, _, plant, notification_type, status in queue:
+            text, keyboard = _notification_message(plant, notification_type, status)
+            outgoing.append((priority, plant, notification_type, text, keyboard))
+
+        if settings.notification_digest:
+            result = await self._enqueue_digest(today, chat_id, outgoing, started)
+            await db.record_daily_run(today, chat_id)
+            return result
+
+        # Уведомления и их сообщения записываются одной транзакцией,
+        # отправит их обработчик очереди
+        queued_check = 0
+        queued_water = 0
+        async with db.transaction():
+            for priority, plant, notification_type, text, keyboard in outgoing:
                 notification = Notification(
                     id=None,
                     plant_id=plant.id,
-                    notification_type=NotificationType.CHECK,
+                    notification_type=notification_type,
                     status=NotificationStatus.PENDING,
-                    message_id=message.message_id,
+                    message_id=None,
                     created_at=datetime.now(),
                 )
-                await db.create_notification(notification)
-                await sheets_service.mark_sent(plant.name)
-                sent_check += 1
+                queued = await outbox.enqueue_notification(
+                    f"{_DAILY_KEY_PREFIX}{notification_type.value}:{plant.id}:{today.isoformat()}",
+                    notification,
+                    chat_id,
+                    text,
+                    keyboard,
+                    priority,
+                )
+                if not queued:
+                    continue
+                if notification_type == NotificationType.CHECK:
+                    queued_check += 1
+                else:
+                    queued_water += 1
+            await db.record_daily_run(today, chat_id)
 
-            except Exception as e:
-                logger.error(f"Ошибка отправки уведомления для {plant.name}: {e}")
+        logger.info(
+            f"В очередь поставлено уведомлений: {queued_check} проверок, {queued_water} поливов "
+            f"за {time.monotonic() - started:.2f} с"
+        )
+        return queued_check, queued_water
+
+    async def _enqueue_digest(
+        self,
+        today: date,
+        chat_id: int,
+        outgoing: list[tuple[int, Plant, NotificationType, str, "InlineKeyboardMarkup"]],
+        started: float,
+    ) -> tuple[int, int]:
+        """Режим дайджеста: все уведомления дня — одним сводным сообщением."""
+        if not outgoing and await db.get_digest(today, chat_id) is None:
+            logger.info("Сегодня уведомлять не о чем")
+            return 0, 0
 
-        # Отправляем уведомления о поливе
-        for plant, status in to_water:
-            # Проверяем, не отправляли ли уже сегодня
-            existing = await db.get_today_notification_for_plant(
-                plant.id, NotificationType.WATER
+        notifications = [
+            Notification(
+                id=None,
+                plant_id=plant.id,
+                notification_type=notification_type,
+                status=NotificationStatus.PENDING,
+                message_id=None,
+                created_at=datetime.now(),
             )
-            if existing:
-                continue
-
-            try:
-                # Добавляем ‼️ если игнор > 2 дней
-                urgent = status.overdue_days >= 2
-                emoji = "‼️ " if urgent else ""
-
-                keyboard = get_watering_keyboard(plant.id)
-                text = (
-                    f"{emoji}🚿 <b>{plant.name}</b>\n\n"
-                    f"{'Срочно полей!' if urgent else 'Пожалуйста, полей цветок!'}"
-                )
+            for _, plant, notification_type, _, _ in outgoing
+        ]
+        await digest_service.enqueue(today, chat_id, notifications)
 
-                if urgent:
-                    text += f"\n\n⚠️ Без полива уже {status.overdue_days} дней"
+        async with sheets_service.batch():
+            for _, plant, _, _, _ in outgoing:
+                await sheets_service.mark_sent(plant.name)
 
-                message = await self.bot.send_message(
-                    settings.active_waterer_id,
-                    text,
-                    reply_markup=keyboard,
-                    parse_mode="HTML",
-                )
+        queued_water = sum(
+            1 for _, _, notification_type, _, _ in outgoing
+            if notification_type == NotificationType.WATER
+        )
+        queued_check = len(outgoing) - queued_water
+        logger.info(
+            f"В сводку добавлено: {queued_check} проверок, {queued_water} поливов "
+            f"за {time.monotonic() - started:.2f} с"
+        )
+        return queued_check, queued_water
+
+    async def _on_notifications_sent(self, messages: list[OutboxMessage]):
+        """Отметить в таблице отправленные уведомления ежедневной рассылки."""
+        if not settings.google_sheets_enabled:
+            return
+
+        notifications = await db.get_notifications(
+            [
+                m.notification_id
+                for m in messages
+                if m.notification_id is not None
+                and m.idempotency_key.startswith(_DAILY_KEY_PREFIX)
+            ]
+        )
+        plants = [
+            plant
+            for notification in notifications
+            if (plant := plant_service.get_plant(notification.plant_id)) is not None
+        ]
+        if not plants:
+            return
 
-                notification = Notification(
-                    id=None,
-                    plant_id=plant.id,
-                    notification_type=NotificationType.WATER,
-                    status=NotificationStatus.PENDING,
-                    message_id=message.message_id,
-                    created_at=datetime.now(),
-                )
-                await db.create_notification(notification)
+        async with sheets_service.batch():
+            for plant in plants:
                 await sheets_service.mark_sent(plant.name)
-                sent_water += 1
 
-            except Exception as e:
-                logger.error(f"Ошибка отправки уведомления о поливе для {plant.name}: {e}")
+    async def _send_reminders(
+        self, for_date: date = None, created_before: datetime = None
+    ) -> int:
+        """
+        Напомнить о неотвеченных уведомлениях одним сообщением.
 
-        logger.info(
-            f"Отправлено уведомлений: {sent_check} проверок, {sent_water} поливов"
-        )
-        return sent_check, sent_water
+        Сводное напоминание перечисляет все неотвеченные растения, статусы
+        обновляются одним запросом в той же транзакции — это один запрос к Telegram
+        на чат, исходные сообщения не редактируются. В режиме дайджеста сводка
+        дополнительно перерисовывается (одна правка): у напомненных растений появляется ⏰.
+
+        created_before — напоминать только об уведомлениях, созданных не позже этого времени.
 
-    async def _send_reminders(self) -> int:
-        """Отправить напоминания о неотвеченных уведомлениях."""
+        Returns:
+            int: сколько уведомлений напомнено
+        """
         if not self.bot:
             return 0
 
         logger.info("Проверка неотвеченных уведомлений...")
 
-        pending = await db.get_pending_notifications()
-        pending_not_reminded = [
-            n for n in pending if n.status == NotificationStatus.PENDING
+        today = for_date or date.today()
+        reminded = [
+            (notification, plant)
+            for notification in await db.get_pending_notifications(today)
+            if notification.status == NotificationStatus.PENDING
+            and (created_before is None or notification.created_at <= created_before)
+            and (plant := plant_service.get_plant(notification.plant_id)) is not None
         ]
-
-        if not pending_not_reminded:
-            logger.info("Все уведомления отвечены")
+        if not reminded:
+            logger.info("Напоминать не о чем")
             return 0
 
-        sent_count = 0
-        for notification in pending_not_reminded:
-            try:
-                plant = plant_service.get_plant(notification.plant_id)
-                if not plant:
-                    continue
+        lines = [
+            f"• <b>{plant.name}</b> — "
+            f"{'проверить почву' if n.notification_type == NotificationType.CHECK else 'полить'}"
+            for n, plant in reminded
+        ]
+        text = "⏰ Напоминание: ты ещё не ответил про\n\n" + "\n".join(lines)
 
-                # Отправляем напоминание активному поливальщику
-                await self.bot.send_message(
-                    settings.active_waterer_id,
-                    f"⏰ Напоминание: ты ещё не ответил про <b>{plant.name}</b>",
-                    parse_mode="HTML",
-                )
+        async with db.transaction():
+            await outbox.enqueue(
+                f"reminder:{today.isoformat()}", settings.active_waterer_id, text
+            )
+            await db.mark_notifications_reminded([n.id for n, _ in reminded])
 
-                # Обновляем статус
-                await db.update_notification(
-                    notification.id, NotificationStatus.REMINDED
-                )
-                sent_count += 1
+        if settings.notification_digest:
+            await digest_service.refresh(await db.get_digest(today, settings.active_waterer_id))
+        logger.info(f"В очередь поставлено напоминание о {len(reminded)} уведомлениях")
+        return len(reminded)
 
-            except Exception as e:
-                logger.error(f"Ошибка отправки напоминания: {e}")
+    async def _reschedule_unanswered(self, for_date: date = None) -> tuple[int, int]:
+        """Перенести неотвеченные уведомления дня (по умолчанию сегодняшнего) на следующий."""
+        logger.info("Перенос неотвеченных уведомлений...")
+        rescheduled, overdue = await plant_service.reschedule_unanswered(for_date)
+        logger.info(
+            f"Перенесено на завтра {rescheduled} уведомлений, "
+            f"без полива ещё день: {overdue} растений"
+        )
+        return rescheduled, overdue
 
-        logger.info(f"Отправлено {sent_count} напоминаний")
-        return sent_count
+    async def _run_maintenance(self, for_date: date = None) -> tuple[int, float]:
+        """Перенести старые уведомления в архив, почистить очередь сообщений и обслужить БД."""
+        logger.info("Обслуживание базы данных...")
+        started = time.monotonic()
 
-    async def _reschedule_unanswered(self):
-        """Перенести неотвеченные уведомления на завтра."""
-        logger.info("Перенос неотвеченных уведомлений...")
-        await plant_service.reschedule_unanswered()
-        logger.info("Неотвеченные уведомления перенесены на завтра")
+        try:
+            older_than = (for_date or date.today()) - timedelta(
+                days=settings.notifications_retention_days
+            )
+            archived = await db.archive_notifications(older_than)
+            await db.prune_outbox(datetime.combine(older_than, datetime.min.time()))
+            await db.prune_daily_runs(older_than)
+            await db.optimize()
+        except Exception as e:
+            # Пробрасываем, чтобы _run_job не записал запуск в журнал и его догнали позже
+            logger.error(f"Ошибка обслуживания базы данных: {e}")
+            raise
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Обслуживание завершено: в архив перенесено {archived} уведомлений "
+            f"за {elapsed:.2f} с"
+        )
+        return archived, elapsed
 
 
 # Глобальный экземпляр
@@ -0,0 +1,89 @@
+"""Отправка сообщений в Telegram с ограничением частоты."""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot.config import settings
+from bot.services.rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.types import Message
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramSender:
+    """
+    Отправщик сообщений с лимитами Telegram.
+
+    Одновременно в полёте не больше telegram_send_concurrency запросов,
+    частоту ограничивают общее ведро бота и ведро каждого чата.
+    На TelegramRetryAfter ставит на паузу ведро чата и общее ведро и повторяет отправку.
+    """
+
+    def __init__(self):
+        self.bot: "Bot" = None
+        self._semaphore = asyncio.Semaphore(settings.telegram_send_concurrency)
+        self._global_bucket = TokenBucket(
+            settings.telegram_global_rate, settings.telegram_global_rate
+        )
+        self._chat_buckets: dict[int, TokenBucket] = {}
+
+    def set_bot(self, bot: "Bot"):
+        """Установить экземпляр бота."""
+        self.bot = bot
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        """Ведро токенов чата (создаётся при первой отправке)."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                settings.telegram_chat_rate, settings.telegram_chat_burst
+            )
+        return bucket
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> "Message":
+        """Отправить сообщение с учётом лимитов (аргументы — как у Bot.send_message)."""
+        return await self._call(
+            chat_id, lambda: self.bot.send_message(chat_id, text, **kwargs)
+        )
+
+    async def edit_message_text(
+        self, chat_id: int, message_id: int, text: str, **kwargs: Any
+    ) -> Any:
+        """Изменить текст сообщения с учётом лимитов (аргументы — как у Bot.edit_message_text)."""
+        return await self._call(
+            chat_id,
+            lambda: self.bot.edit_message_text(
+                text, chat_id=chat_id, message_id=message_id, **kwargs
+            ),
+        )
+
+    async def _call(self, chat_id: int, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить запрос к API в чат: дождаться токенов, на RetryAfter — пауза и повтор."""
+        chat_bucket = self._chat_bucket(chat_id)
+        attempt = 0
+
+        async with self._semaphore:
+            while True:
+                await chat_bucket.acquire()
+                await self._global_bucket.acquire()
+                try:
+                    return await request()
+                except TelegramRetryAfter as e:
+                    attempt += 1
+                    if attempt > settings.telegram_send_retries:
+                        raise
+                    logger.warning(
+                        f"Лимит Telegram для чата {chat_id}, повтор через {e.retry_after} с"
+                    )
+                    chat_bucket.pause(e.retry_after)
+                    self._global_bucket.pause(e.retry_after)
+
+
+# Глобальный экземпляр
+telegram_sender = TelegramSender()
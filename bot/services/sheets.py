@@ -1,12 +1,18 @@
 """Сервис синхронизации с Google Sheets."""
 
+import asyncio
 import base64
 import json
 import logging
-from datetime import date, datetime, timedelta
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import AsyncIterator, Optional
 
 from bot.config import settings
+from bot.database.models import SheetsCell, SheetsColor
+from bot.database.repository import db
+from bot.services.sheets_client import SheetsApiClient
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +21,32 @@ COLOR_YELLOW = {"red": 1.0, "green": 0.95, "blue": 0.6}  # Отправлено
 COLOR_GREEN = {"red": 0.7, "green": 0.9, "blue": 0.7}  # Ответ получен
 COLOR_WHITE = {"red": 1.0, "green": 1.0, "blue": 1.0}  # Без цвета
 
+_COLORS = {SheetsColor.YELLOW: COLOR_YELLOW, SheetsColor.GREEN: COLOR_GREEN}
+
+# Метка запланированного действия (ставится только в пустую ячейку)
+MARK_SCHEDULED = "📋"
+
 
 class GoogleSheetsService:
-    """Сервис для работы с Google Sheets."""
+    """
+    Сервис для работы с Google Sheets.
+
+    mark_* ничего не отправляют в Google: изменение ячейки записывается в журнал
+    sheets_journal в SQLite (изменения одной ячейки схлопываются, побеждает последнее),
+    и обработчик сразу продолжает работу. Фоновая задача раз в sheets_flush_seconds
+    забирает журнал, превращает его в один пакет значений и один пакет цветов
+    и удаляет записанное. Если Google недоступен, журнал копится и дописывается
+    после восстановления (в том числе после перезапуска бота).
+
+    gspread синхронный, поэтому все запросы к API идут через SheetsApiClient:
+    в отдельном потоке (строго по очереди, цикл событий их не блокирует),
+    с ограничением частоты под квоту и повторами при 429/5xx.
+
+    Значения листа зеркалируются в памяти: лист читается целиком одним запросом
+    при подключении, раз в sheets_mirror_refresh_seconds и после ошибки записи,
+    а каждая успешная запись обновляет зеркало. Поиск строк и столбцов и проверка
+    «ячейка пуста» идут по зеркалу, без чтений перед записью.
+    """
 
     def __init__(self):
         self._client = None
@@ -25,6 +54,17 @@ class GoogleSheetsService:
         self._worksheet = None
         self._plant_rows: dict[str, int] = {}  # plant_id -> row number
         self._date_cols: dict[str, int] = {}  # date string -> column number
+        self._row_count = 0  # заполненных строк в первом столбце
+        self._col_count = 0  # заполненных столбцов в первой строке
+        self._structure_loaded = False
+        # Зеркало значений листа: (row, col) -> непустое значение
+        self._grid: dict[tuple[int, int], str] = {}
+        self._grid_loaded_at = 0.0
+        # Пакет, который соберёт и запишет flush()
+        self._pending_values: dict[tuple[int, int], str] = {}
+        self._pending_colors: dict[tuple[int, int], dict] = {}
+        self._api = SheetsApiClient()
+        self._task: Optional[asyncio.Task] = None
 
     async def init(self):
         """Инициализация подключения к Google Sheets."""
@@ -33,51 +73,9 @@ class GoogleSheetsService:
             return
 
         try:
-            import gspread
-            from google.oauth2.service_account import Credentials
-
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets",
-                "https://www.googleapis.com/auth/drive",
-            ]
-
-            # Получаем credentials из base64 или из файла
-            if settings.google_sheets_credentials_base64:
-                # Декодируем base64 в JSON
-                credentials_json = base64.b64decode(
-                    settings.google_sheets_credentials_base64
-                ).decode("utf-8")
-                credentials_info = json.loads(credentials_json)
-                credentials = Credentials.from_service_account_info(
-                    credentials_info, scopes=scopes
-                )
-                logger.info("Используем credentials из base64")
-            else:
-                # Используем файл
-                credentials = Credentials.from_service_account_file(
-                    settings.google_sheets_credentials_file, scopes=scopes
-                )
-                logger.info("Используем credentials из файла")
-
-            self._client = gspread.authorize(credentials)
-            self._spreadsheet = self._client.open_by_key(
-                settings.google_sheets_spreadsheet_id
-            )
-
-            # Используем лист "Календарь" или создаём новый
-            try:
-                self._worksheet = self._spreadsheet.worksheet("Календарь")
-            except gspread.WorksheetNotFound:
-                self._worksheet = self._spreadsheet.add_worksheet(
-                    title="Календарь", rows=50, cols=100
-                )
-                # Добавляем заголовок первого столбца
-                self._worksheet.update_cell(1, 1, "Растение")
-
-            # Загружаем существующие данные
-            await self._load_structure()
+            await self._connect_and_load()
 
-            # Создаём колонки на 30 дней вперёд
+            # Создаём колонки на 30 дней вперёд (запишутся при ближайшей записи журнала)
             await self._ensure_date_columns_for_period(days=30)
 
             logger.info("Google Sheets подключён успешно")
@@ -86,6 +84,57 @@ class GoogleSheetsService:
             logger.error(f"Ошибка подключения к Google Sheets: {e}")
             self._client = None
 
+    def _connect(self):
+        """Подключиться к таблице и открыть (или создать) лист (выполняется в потоке)."""
+        if settings.google_sheets_fake:
+            from bot.services.sheets_fake import FakeWorksheet
+
+            self._worksheet = FakeWorksheet()
+            self._worksheet.update_cell(1, 1, "Растение")
+            logger.info("Используем лист в памяти вместо Google Sheets")
+            return
+
+        import gspread
+        from google.oauth2.service_account import Credentials
+
+        scopes = [
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive",
+        ]
+
+        # Получаем credentials из base64 или из файла
+        if settings.google_sheets_credentials_base64:
+            # Декодируем base64 в JSON
+            credentials_json = base64.b64decode(
+                settings.google_sheets_credentials_base64
+            ).decode("utf-8")
+            credentials_info = json.loads(credentials_json)
+            credentials = Credentials.from_service_account_info(
+                credentials_info, scopes=scopes
+            )
+            logger.info("Используем credentials из base64")
+        else:
+            # Используем файл
+            credentials = Credentials.from_service_account_file(
+                settings.google_sheets_credentials_file, scopes=scopes
+            )
+            logger.info("Используем credentials из файла")
+
+        self._client = gspread.authorize(credentials)
+        self._spreadsheet = self._client.open_by_key(
+            settings.google_sheets_spreadsheet_id
+        )
+
+        # Используем лист "Календарь" или создаём новый
+        try:
+            self._worksheet = self._spreadsheet.worksheet("Календарь")
+        except gspread.WorksheetNotFound:
+            self._worksheet = self._spreadsheet.add_worksheet(
+                title="Календарь", rows=50, cols=100
+            )
+            # Добавляем заголовок первого столбца
+            self._worksheet.update_cell(1, 1, "Растение")
+
     async def init_plants(self, plant_names: list[str]):
         """Инициализировать строки для всех растений."""
         if not settings.google_sheets_enabled or not self._worksheet:
@@ -98,27 +147,168 @@ class GoogleSheetsService:
         except Exception as e:
             logger.error(f"Ошибка инициализации растений: {e}")
 
-    async def _load_structure(self):
-        """Загрузить структуру таблицы (строки растений и столбцы дат)."""
+    async def _connect_and_load(self):
+        """Подключиться (если ещё не подключены) и загрузить структуру таблицы."""
         if not self._worksheet:
-            return
+            await self._api.call(self._connect)
+        await self._load_structure()
 
-        try:
-            # Загружаем первый столбец (названия растений)
-            plant_names = self._worksheet.col_values(1)
-            for i, name in enumerate(plant_names[1:], start=2):  # Пропускаем заголовок
-                if name:
-                    # Сохраняем по имени, потом сопоставим с ID
-                    self._plant_rows[name] = i
-
-            # Загружаем первую строку (даты)
-            dates = self._worksheet.row_values(1)
-            for i, date_str in enumerate(dates[1:], start=2):  # Пропускаем "Растение"
-                if date_str:
-                    self._date_cols[date_str] = i
+    async def _load_structure(self):
+        """Прочитать лист в зеркало и разобрать структуру (строки растений и столбцы дат)."""
+        self._structure_loaded = False
+        self._plant_rows.clear()
+        self._date_cols.clear()
+        # Несохранённый пакет ссылается на старые номера строк и столбцов
+        self._pending_values.clear()
+        self._pending_colors.clear()
+
+        values = await self._api.call(self._worksheet.get_all_values)
+        self._grid = {
+            (row, col): value
+            for row, row_values in enumerate(values, start=1)
+            for col, value in enumerate(row_values, start=1)
+            if value
+        }
+        self._grid_loaded_at = time.monotonic()
+
+        # Первый столбец — названия растений, первая строка — даты
+        self._row_count = max((row for row, col in self._grid if col == 1), default=0)
+        self._col_count = max((col for row, col in self._grid if row == 1), default=0)
+        for (row, col), value in self._grid.items():
+            if col == 1 and row > 1:  # Пропускаем заголовок
+                # Сохраняем по имени, потом сопоставим с ID
+                self._plant_rows[value] = row
+            elif row == 1 and col > 1:  # Пропускаем "Растение"
+                self._date_cols[value] = col
+
+        self._structure_loaded = True
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[None]:
+        """Записать изменения внутри блока в журнал одной транзакцией."""
+        async with db.transaction():
+            yield
+
+    def start(self):
+        """Запустить фоновую запись журнала в таблицу."""
+        if settings.google_sheets_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Остановить фоновую запись, попытаться дописать журнал и остановить поток."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Журнал Google Sheets не дописан, допишем после запуска: {e}")
+
+        logger.info(f"Google Sheets API: {self._api.stats()}")
+        self._api.shutdown()
+
+    async def _run(self):
+        """Цикл записи журнала; при сбоях пауза растёт до sheets_max_backoff_seconds."""
+        delay = settings.sheets_flush_seconds
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                delay = min(delay * 2, settings.sheets_max_backoff_seconds)
+                logger.warning(
+                    f"Запись в Google Sheets не удалась ({e}), повтор через {delay:.0f} с"
+                )
+            else:
+                delay = settings.sheets_flush_seconds
+
+    async def flush(self) -> int:
+        """
+        Записать журнал в таблицу (пакетами по sheets_flush_batch_size).
+
+        Raises:
+            Exception: ошибка Google — записи журнала остаются до следующей попытки
 
+        Returns:
+            int: сколько ячеек записано
+        """
+        mirror_age = time.monotonic() - self._grid_loaded_at
+        if not self._structure_loaded or (
+            mirror_age > settings.sheets_mirror_refresh_seconds and not self._pending_values
+        ):
+            await self._connect_and_load()
+
+        written = 0
+        while True:
+            cells = await db.get_sheets_journal(settings.sheets_flush_batch_size)
+            for cell in cells:
+                row = await self._ensure_plant_row(cell.plant_name)
+                col = await self._ensure_date_column(cell.day)
+                if cell.if_empty:
+                    self._mark_if_empty(row, col)
+                else:
+                    self._set_value(row, col, cell.value)
+                    if cell.color:
+                        self._set_color(row, col, _COLORS[cell.color])
+
+            values, self._pending_values = self._pending_values, {}
+            colors, self._pending_colors = self._pending_colors, {}
+            try:
+                if values:
+                    await self._api.call(
+                        self._worksheet.batch_update,
+                        [
+                            {"range": _cell_name(row, col), "values": [[value]]}
+                            for (row, col), value in values.items()
+                        ],
+                        raw=False,
+                    )
+                    self._grid.update(values)
+                if colors:
+                    await self._api.call(
+                        self._worksheet.batch_format,
+                        [
+                            {"range": _cell_name(row, col), "format": {"backgroundColor": color}}
+                            for (row, col), color in colors.items()
+                        ],
+                    )
+            except Exception:
+                # Неизвестно, что успело записаться, — перечитаем лист
+                self._structure_loaded = False
+                raise
+
+            if not cells:
+                return written
+            await db.delete_sheets_journal(cells)
+            written += len(cells)
+            logger.debug(f"Журнал Google Sheets: записано {len(cells)} ячеек")
+            if len(cells) < settings.sheets_flush_batch_size:
+                return written
+
+    async def _journal(self, cell: SheetsCell):
+        """Записать изменение ячейки в журнал (в Google оно уйдёт при следующей записи)."""
+        try:
+            await db.journal_sheets_cell(cell)
         except Exception as e:
-            logger.error(f"Ошибка загрузки структуры таблицы: {e}")
+            logger.error(f"Ошибка записи в журнал Google Sheets: {e}")
+
+    def _set_value(self, row: int, col: int, value: str):
+        """Запланировать запись значения в ячейку."""
+        self._pending_values[(row, col)] = value
+
+    def _set_color(self, row: int, col: int, color: dict):
+        """Запланировать установку цвета ячейки."""
+        self._pending_colors[(row, col)] = color
+
+    def _mark_if_empty(self, row: int, col: int):
+        """Запланировать метку MARK_SCHEDULED, если ячейка пуста (по зеркалу и пакету)."""
+        if (row, col) not in self._pending_values and not self._grid.get((row, col)):
+            self._set_value(row, col, MARK_SCHEDULED)
 
     def _get_date_str(self, d: date = None) -> str:
         """Получить строку даты в формате DD.MM."""
@@ -127,31 +317,26 @@ class GoogleSheetsService:
         return d.strftime("%d.%m")
 
     async def _ensure_plant_row(self, plant_name: str) -> int:
-        """Убедиться, что строка для растения существует."""
+        """Убедиться, что строка для растения существует (запись — в пакете)."""
         if not self._worksheet:
             return -1
 
         if plant_name in self._plant_rows:
             return self._plant_rows[plant_name]
 
-        try:
-            # Находим следующую пустую строку
-            all_values = self._worksheet.col_values(1)
-            next_row = len(all_values) + 1
+        # Следующая пустая строка
+        self._row_count = max(self._row_count, 1) + 1
+        next_row = self._row_count
 
-            # Добавляем растение
-            self._worksheet.update_cell(next_row, 1, plant_name)
-            self._plant_rows[plant_name] = next_row
+        # Добавляем растение
+        self._set_value(next_row, 1, plant_name)
+        self._plant_rows[plant_name] = next_row
 
-            logger.debug(f"Добавлена строка для растения: {plant_name} (row {next_row})")
-            return next_row
-
-        except Exception as e:
-            logger.error(f"Ошибка добавления строки растения: {e}")
-            return -1
+        logger.debug(f"Добавлена строка для растения: {plant_name} (row {next_row})")
+        return next_row
 
     async def _ensure_date_column(self, d: date = None) -> int:
-        """Убедиться, что столбец для даты существует."""
+        """Убедиться, что столбец для даты существует (запись — в пакете)."""
         if not self._worksheet:
             return -1
 
@@ -160,157 +345,114 @@ class GoogleSheetsService:
         if date_str in self._date_cols:
             return self._date_cols[date_str]
 
-        try:
-            # Находим правильную позицию для вставки (по порядку дат)
-            target_date = d if d else date.today()
-            insert_col = 2  # После столбца "Растение"
-
-            # Находим позицию, куда вставить дату по порядку
-            for existing_date_str, col in sorted(self._date_cols.items(), key=lambda x: x[1]):
-                try:
-                    existing_day, existing_month = map(int, existing_date_str.split("."))
-                    existing_date = date(target_date.year, existing_month, existing_day)
-                    if target_date > existing_date:
-                        insert_col = col + 1
-                except:
-                    continue
-
-            # Если столбец уже занят, добавляем в конец
-            all_values = self._worksheet.row_values(1)
-            if insert_col <= len(all_values):
-                insert_col = len(all_values) + 1
-
-            # Добавляем дату
-            self._worksheet.update_cell(1, insert_col, date_str)
-            self._date_cols[date_str] = insert_col
-
-            logger.debug(f"Добавлен столбец для даты: {date_str} (col {insert_col})")
-            return insert_col
-
-        except Exception as e:
-            logger.error(f"Ошибка добавления столбца даты: {e}")
-            return -1
-
-    async def _ensure_date_columns_for_period(self, days: int = 30):
-        """Создать колонки дат на указанный период."""
-        if not self._worksheet:
-            return
-
-        try:
-            today = date.today()
-            dates_to_add = []
-
-            # Собираем все даты, которых ещё нет
-            for i in range(days):
-                d = today + timedelta(days=i)
-                date_str = self._get_date_str(d)
-                if date_str not in self._date_cols:
-                    dates_to_add.append((d, date_str))
-
-            if not dates_to_add:
-                return
-
-            # Получаем текущее количество столбцов
-            all_values = self._worksheet.row_values(1)
-            next_col = len(all_values) + 1
+        # Находим правильную позицию для вставки (по порядку дат)
+        target_date = d if d else date.today()
+        insert_col = 2  # После столбца "Растение"
 
-            # Добавляем все даты пакетом
-            cells_to_update = []
-            for d, date_str in dates_to_add:
-                self._date_cols[date_str] = next_col
-                cells_to_update.append((1, next_col, date_str))
-                next_col += 1
+        # Находим позицию, куда вставить дату по порядку
+        for existing_date_str, col in sorted(self._date_cols.items(), key=lambda x: x[1]):
+            try:
+                existing_day, existing_month = map(int, existing_date_str.split("."))
+                existing_date = date(target_date.year, existing_month, existing_day)
+                if target_date > existing_date:
+                    insert_col = col + 1
+            except:
+                continue
 
-            # Обновляем пакетом для скорости
-            for row, col, value in cells_to_update:
-                self._worksheet.update_cell(row, col, value)
+        # Если столбец уже занят, добавляем в конец
+        if insert_col <= self._col_count:
+            insert_col = self._col_count + 1
+        self._col_count = max(self._col_count, insert_col)
 
-            logger.info(f"Добавлено {len(dates_to_add)} столбцов дат")
+        # Добавляем дату
+        self._set_value(1, insert_col, date_str)
+        self._date_cols[date_str] = insert_col
 
-        except Exception as e:
-            logger.error(f"Ошибка создания столбцов дат: {e}")
+        logger.debug(f"Добавлен столбец для даты: {date_str} (col {insert_col})")
+        return insert_col
 
-    async def _set_cell_color(self, row: int, col: int, color: dict):
-        """Установить цвет ячейки."""
+    async def _ensure_date_columns_for_period(self, days: int = 30):
+        """Создать колонки дат на указанный период."""
         if not self._worksheet:
             return
 
-        try:
-            self._worksheet.format(
-                f"{_col_letter(col)}{row}",
-                {"backgroundColor": color}
-            )
-        except Exception as e:
-            logger.error(f"Ошибка установки цвета ячейки: {e}")
+        today = date.today()
+        added = 0
+        for i in range(days):
+            d = today + timedelta(days=i)
+            if self._get_date_str(d) not in self._date_cols:
+                await self._ensure_date_column(d)
+                added += 1
+
+        if added:
+            logger.info(f"Добавлено {added} столбцов дат")
 
     async def mark_scheduled(self, plant_name: str, scheduled_date: date = None):
-        """Отметить запланированное действие (без цвета, только метка)."""
-        if not settings.google_sheets_enabled or not self._worksheet:
+        """Отметить запланированное действие (без цвета, только метка в пустую ячейку)."""
+        if not settings.google_sheets_enabled:
             return
 
-        try:
-            row = await self._ensure_plant_row(plant_name)
-            col = await self._ensure_date_column(scheduled_date)
-
-            if row > 0 and col > 0:
-                # Ставим метку "📋" если ячейка пустая
-                current = self._worksheet.cell(row, col).value
-                if not current:
-                    self._worksheet.update_cell(row, col, "📋")
-                    logger.debug(f"Запланировано: {plant_name} на {self._get_date_str(scheduled_date)}")
-
-        except Exception as e:
-            logger.error(f"Ошибка отметки запланированного: {e}")
+        await self._journal(
+            SheetsCell(
+                plant_name=plant_name,
+                day=scheduled_date or date.today(),
+                value=MARK_SCHEDULED,
+                if_empty=True,
+            )
+        )
+        logger.debug(f"Запланировано: {plant_name} на {self._get_date_str(scheduled_date)}")
 
     async def mark_sent(self, plant_name: str, sent_date: date = None):
         """Отметить отправленное уведомление (жёлтый цвет)."""
-        if not settings.google_sheets_enabled or not self._worksheet:
+        if not settings.google_sheets_enabled:
             return
 
-        try:
-            row = await self._ensure_plant_row(plant_name)
-            col = await self._ensure_date_column(sent_date)
-
-            if row > 0 and col > 0:
-                # Обновляем содержимое и цвет
-                self._worksheet.update_cell(row, col, "📨")
-                await self._set_cell_color(row, col, COLOR_YELLOW)
-                logger.debug(f"Отправлено: {plant_name} ({self._get_date_str(sent_date)})")
-
-        except Exception as e:
-            logger.error(f"Ошибка отметки отправленного: {e}")
+        await self._journal(
+            SheetsCell(
+                plant_name=plant_name,
+                day=sent_date or date.today(),
+                value="📨",
+                color=SheetsColor.YELLOW,
+            )
+        )
+        logger.debug(f"Отправлено: {plant_name} ({self._get_date_str(sent_date)})")
 
     async def mark_answered(self, plant_name: str, answer: str, answered_date: date = None):
         """Отметить полученный ответ (зелёный цвет)."""
-        if not settings.google_sheets_enabled or not self._worksheet:
+        if not settings.google_sheets_enabled:
             return
 
-        try:
-            row = await self._ensure_plant_row(plant_name)
-            col = await self._ensure_date_column(answered_date)
-
-            if row > 0 and col > 0:
-                # Обновляем содержимое и цвет
-                self._worksheet.update_cell(row, col, answer)
-                await self._set_cell_color(row, col, COLOR_GREEN)
-                logger.debug(f"Ответ получен: {plant_name} = {answer} ({self._get_date_str(answered_date)})")
-
-        except Exception as e:
-            logger.error(f"Ошибка отметки ответа: {e}")
+        await self._journal(
+            SheetsCell(
+                plant_name=plant_name,
+                day=answered_date or date.today(),
+                value=answer,
+                color=SheetsColor.GREEN,
+            )
+        )
+        logger.debug(
+            f"Ответ получен: {plant_name} = {answer} ({self._get_date_str(answered_date)})"
+        )
 
     async def sync_scheduled_dates(self, plants_schedule: dict[str, list[date]]):
         """
         Синхронизировать запланированные даты для всех растений.
-        
+
         Args:
             plants_schedule: {plant_name: [date1, date2, ...]}
         """
-        if not settings.google_sheets_enabled or not self._worksheet:
+        if not settings.google_sheets_enabled:
             return
 
-        for plant_name, dates in plants_schedule.items():
-            for d in dates:
-                await self.mark_scheduled(plant_name, d)
+        async with self.batch():
+            for plant_name, dates in plants_schedule.items():
+                for d in dates:
+                    await self.mark_scheduled(plant_name, d)
+
+
+def _cell_name(row: int, col: int) -> str:
+    """Адрес ячейки в нотации A1."""
+    return f"{_col_letter(col)}{row}"
 
 
 def _col_letter(col_num: int) -> str:
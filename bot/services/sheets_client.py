@@ -0,0 +1,117 @@
+"""Вызовы Google Sheets API с учётом квот: ограничение частоты, повторы и метрики."""
+
+import asyncio
+import functools
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from bot.config import settings
+from bot.services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Коды ответа, после которых запрос стоит повторить: превышение квоты и ошибки сервера
+_RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+_QUOTA_EXCEEDED = 429
+
+
+def _status_code(e: Exception) -> int:
+    """HTTP-код ошибки gspread (0 — не ошибка API)."""
+    from gspread.exceptions import APIError
+
+    if isinstance(e, APIError):
+        return e.response.status_code
+    return 0
+
+
+def _is_retryable(e: Exception) -> bool:
+    """Временная ли ошибка: квота, ошибка сервера или сеть."""
+    import requests
+
+    if _status_code(e) in _RETRY_STATUS_CODES:
+        return True
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+class SheetsApiClient:
+    """
+    Исполнитель синхронных вызовов gspread.
+
+    Вызовы выполняются по одному в отдельном потоке, частоту ограничивает ведро
+    токенов под квоту Sheets API (sheets_requests_per_minute). На 429 и 5xx запрос
+    повторяется с экспоненциальной задержкой со случайной составляющей; на 429
+    ведро ставится на паузу, чтобы подождали и остальные запросы.
+
+    Один call() — один запрос к API: этого ждёт квота.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets")
+        self._bucket = TokenBucket(
+            settings.sheets_requests_per_minute / 60, settings.sheets_burst
+        )
+        # Метрики
+        self.requests = 0  # отправлено запросов (с повторами)
+        self.retries = 0
+        self.failures = 0  # запросов, завершившихся ошибкой
+        self.throttled_seconds = 0.0  # ожидание квоты (ведро и паузы после 429)
+        self.backoff_seconds = 0.0  # ожидание перед повторами после ошибок сервера и сети
+
+    async def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполнить вызов gspread с учётом квоты и повторами временных ошибок."""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            await self._bucket.acquire()
+            self.throttled_seconds += time.monotonic() - started
+
+            self.requests += 1
+            try:
+                return await loop.run_in_executor(
+                    self._executor, functools.partial(func, *args, **kwargs)
+                )
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= settings.sheets_api_retries:
+                    self.failures += 1
+                    raise
+
+                delay = _backoff_delay(attempt)
+                attempt += 1
+                self.retries += 1
+                logger.warning(
+                    f"Google Sheets: {e}, попытка {attempt} из {settings.sheets_api_retries}, "
+                    f"повтор через {delay:.1f} с"
+                )
+                if _status_code(e) == _QUOTA_EXCEEDED:
+                    # Ожидание засчитается в throttled_seconds при следующем acquire()
+                    self._bucket.pause(delay)
+                else:
+                    self.backoff_seconds += delay
+                    await asyncio.sleep(delay)
+
+    def stats(self) -> dict[str, float]:
+        """Метрики вызовов."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "backoff_seconds": round(self.backoff_seconds, 3),
+        }
+
+    def shutdown(self):
+        """Дождаться текущего вызова и остановить поток."""
+        self._executor.shutdown(wait=True)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Задержка перед повтором: половина — экспонента, половина — случайная."""
+    cap = min(
+        settings.sheets_api_backoff_seconds * 2**attempt,
+        settings.sheets_api_max_backoff_seconds,
+    )
+    return cap / 2 + random.uniform(0, cap / 2)
@@ -0,0 +1,116 @@
+"""Лист Google Sheets в памяти — для запуска и проверок без доступа к Google."""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Iterable, MutableMapping
+
+
+def _api_error(status_code: int, message: str) -> Exception:
+    """Ошибка gspread.APIError с заданным HTTP-кодом (как от настоящего API)."""
+    import requests
+    from gspread.exceptions import APIError
+
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(
+        {"error": {"code": status_code, "message": message, "status": "FAKE"}}
+    ).encode()
+    return APIError(response)
+
+
+class FakeWorksheet:
+    """
+    Лист в памяти с интерфейсом gspread.Worksheet (только методы, которые использует бот).
+
+    Каждый метод — один «запрос»: выдерживает latency, считается в requests
+    и в квоте quota_per_minute (сверх неё — ошибка 429, как у Sheets API).
+    fail_next() задаёт ошибки для следующих запросов, например 503.
+    """
+
+    def __init__(
+        self,
+        title: str = "Календарь",
+        latency: float = 0.0,
+        quota_per_minute: int = None,
+    ):
+        self.title = title
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.cells: dict[tuple[int, int], str] = {}
+        self.formats: dict[tuple[int, int], dict] = {}
+        self.requests = 0  # принятых запросов
+        self.rejected = 0  # отклонённых (квота и заданные ошибки)
+        self._request_times: deque[float] = deque()
+        self._failures: deque[int] = deque()
+        self._lock = threading.Lock()
+
+    def fail_next(self, *status_codes: int):
+        """Следующие запросы завершатся ошибками с этими кодами (по одному на запрос)."""
+        with self._lock:
+            self._failures.extend(status_codes)
+
+    def _request(self):
+        """Учесть запрос: задержка, заданные ошибки, квота за последние 60 секунд."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            now = time.monotonic()
+            while self._request_times and now - self._request_times[0] >= 60:
+                self._request_times.popleft()
+
+            if self._failures:
+                self.rejected += 1
+                raise _api_error(self._failures.popleft(), "Fake failure")
+            if (
+                self.quota_per_minute is not None
+                and len(self._request_times) >= self.quota_per_minute
+            ):
+                self.rejected += 1
+                raise _api_error(429, "Quota exceeded")
+
+            self._request_times.append(now)
+            self.requests += 1
+
+    def get_all_values(self) -> list[list[str]]:
+        """Все значения листа (прямоугольником до последней заполненной ячейки)."""
+        self._request()
+        if not self.cells:
+            return []
+        rows = max(row for row, _ in self.cells)
+        cols = max(col for _, col in self.cells)
+        return [
+            [self.cells.get((row, col), "") for col in range(1, cols + 1)]
+            for row in range(1, rows + 1)
+        ]
+
+    def update_cell(self, row: int, col: int, value: Any):
+        """Записать значение ячейки."""
+        self._request()
+        self._set(row, col, value)
+
+    def batch_update(self, data: Iterable[MutableMapping[str, Any]], raw: bool = True):
+        """Записать значения по диапазонам A1 (одна ячейка — один диапазон)."""
+        from gspread.utils import a1_to_rowcol
+
+        self._request()
+        for item in data:
+            row, col = a1_to_rowcol(item["range"])
+            self._set(row, col, item["values"][0][0])
+
+    def batch_format(self, formats: list[dict]):
+        """Записать форматы по диапазонам A1."""
+        from gspread.utils import a1_to_rowcol
+
+        self._request()
+        for item in formats:
+            self.formats[a1_to_rowcol(item["range"])] = item["format"]
+
+    def _set(self, row: int, col: int, value: Any):
+        """Записать значение (пустое — очистить ячейку)."""
+        if value in (None, ""):
+            self.cells.pop((row, col), None)
+        else:
+            self.cells[(row, col)] = str(value)
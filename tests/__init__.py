@@ -0,0 +1,10 @@
+"""Тесты бота."""
+
+import os
+
+# Settings() читает обязательные поля из окружения при импорте bot.config
+os.environ.setdefault("BOT_TOKEN", "test")
+os.environ.setdefault("ADMIN_USER_IDS", "1")
+os.environ.setdefault("ADMIN_NAMES", "Тест")
+os.environ.setdefault("ACTIVE_WATERER_ID", "1")
+os.environ.setdefault("GOOGLE_SHEETS_ENABLED", "false")
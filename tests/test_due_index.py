@@ -0,0 +1,47 @@
+"""Выборки из календаря сроков проверки."""
+
+import unittest
+from datetime import date
+
+from bot.services.due_index import DueIndex
+
+
+class DueIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = DueIndex()
+        self.index.set("ficus", date(2026, 5, 3))
+        self.index.set("cactus", date(2026, 5, 1))
+        self.index.set("aloe", date(2026, 5, 3))
+        self.index.set("palm", date(2026, 5, 10))
+
+    def test_iterates_by_date(self):
+        self.assertEqual(
+            list(self.index),
+            [
+                (date(2026, 5, 1), "cactus"),
+                (date(2026, 5, 3), "aloe"),
+                (date(2026, 5, 3), "ficus"),
+                (date(2026, 5, 10), "palm"),
+            ],
+        )
+
+    def test_due_between_is_inclusive(self):
+        self.assertEqual(
+            self.index.due_between(date(2026, 5, 3), date(2026, 5, 10)),
+            [
+                (date(2026, 5, 3), "aloe"),
+                (date(2026, 5, 3), "ficus"),
+                (date(2026, 5, 10), "palm"),
+            ],
+        )
+        self.assertEqual(self.index.due_between(date(2026, 5, 4), date(2026, 5, 9)), [])
+
+    def test_due_until_after_move(self):
+        self.index.set("palm", date(2026, 5, 2))
+        self.index.discard("cactus")
+        self.assertEqual(self.index.due_until(date(2026, 5, 3)), ["palm", "aloe", "ficus"])
+        self.assertEqual(self.index.count(date(2026, 5, 10)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Порядок ежедневных уведомлений в очереди отправки."""
+
+import unittest
+from datetime import date
+
+from bot.database.models import (
+    NotificationType,
+    Plant,
+    PlantStatus,
+    SoilMoisture,
+    WateringPreference,
+)
+from bot.services.scheduler import (
+    _PRIORITY_CHECK,
+    _PRIORITY_OVERDUE_WATER,
+    _PRIORITY_OVERWATER_WATER,
+    _PRIORITY_WATER,
+    _notification_priority,
+)
+
+
+def _plant(preference: WateringPreference) -> Plant:
+    return Plant(
+        id="ficus",
+        name="Фикус",
+        photo="images/ficus.png",
+        check_interval_days=7,
+        wet_interval_days=3,
+        moist_interval_days=2,
+        preference=preference,
+    )
+
+
+def _status(overdue_days: int) -> PlantStatus:
+    # В список на полив попадают только сухие растения с overdue_days > 0
+    return PlantStatus(
+        plant_id="ficus",
+        last_moisture=SoilMoisture.DRY,
+        last_check_date=date(2026, 5, 1),
+        next_check_date=date(2026, 5, 1),
+        overdue_days=overdue_days,
+    )
+
+
+class NotificationPriorityTest(unittest.TestCase):
+    def test_every_tier_is_reachable(self):
+        cases = [
+            (WateringPreference.UNDERWATER, NotificationType.WATER, 2, _PRIORITY_OVERDUE_WATER),
+            (WateringPreference.OVERWATER, NotificationType.WATER, 3, _PRIORITY_OVERDUE_WATER),
+            (WateringPreference.OVERWATER, NotificationType.WATER, 1, _PRIORITY_OVERWATER_WATER),
+            (WateringPreference.UNDERWATER, NotificationType.WATER, 1, _PRIORITY_WATER),
+            (WateringPreference.UNDERWATER, NotificationType.CHECK, 0, _PRIORITY_CHECK),
+            (WateringPreference.OVERWATER, NotificationType.CHECK, 5, _PRIORITY_CHECK),
+        ]
+        for preference, notification_type, overdue_days, expected in cases:
+            with self.subTest(
+                preference=preference, type=notification_type, overdue_days=overdue_days
+            ):
+                priority = _notification_priority(
+                    _plant(preference), notification_type, _status(overdue_days)
+                )
+                self.assertEqual(priority, expected)
+
+    def test_tiers_are_ordered(self):
+        self.assertLess(_PRIORITY_OVERDUE_WATER, _PRIORITY_OVERWATER_WATER)
+        self.assertLess(_PRIORITY_OVERWATER_WATER, _PRIORITY_WATER)
+        self.assertLess(_PRIORITY_WATER, _PRIORITY_CHECK)
+
+
+if __name__ == "__main__":
+    unittest.main()
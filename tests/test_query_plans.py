@@ -0,0 +1,61 @@
+"""Горячие запросы к notifications идут по индексам, а не полным проходом таблицы."""
+
+import unittest
+from datetime import date
+
+from bot.database.models import NotificationType
+from bot.database.repository import Database
+
+
+class QueryPlanTest(unittest.IsolatedAsyncioTestCase):
+    """EXPLAIN QUERY PLAN для запросов, которые выполняют методы Database на актуальной схеме."""
+
+    async def asyncSetUp(self):
+        self.db = Database(":memory:")
+        await self.db.init()
+        self.statements: list[str] = []
+        await self.db.conn.set_trace_callback(self.statements.append)
+
+    async def asyncTearDown(self):
+        await self.db.conn.set_trace_callback(None)
+        await self.db.close()
+
+    async def assert_uses_index(self, query):
+        """Выполнить запрос метода и проверить план каждого его SELECT."""
+        self.statements.clear()
+        await query
+        selects = [sql for sql in self.statements if sql.lstrip().upper().startswith("SELECT")]
+        self.assertTrue(selects, "метод не выполнил ни одного SELECT")
+
+        for sql in selects:
+            plan = [
+                row[3]
+                for row in await self.db.conn.execute_fetchall(f"EXPLAIN QUERY PLAN {sql}")
+            ]
+            with self.subTest(sql=sql.strip()):
+                self.assertTrue(any(step.startswith("SEARCH") for step in plan), plan)
+                self.assertFalse(any(step.startswith("SCAN") for step in plan), plan)
+
+    async def test_pending_notifications(self):
+        await self.assert_uses_index(self.db.get_pending_notifications(date(2026, 5, 1)))
+
+    async def test_notifications_by_ids(self):
+        await self.assert_uses_index(self.db.get_notifications([1, 2, 3]))
+
+    async def test_notification_by_message_id(self):
+        await self.assert_uses_index(self.db.get_notification_by_message_id(7, 42))
+
+    async def test_today_notification_for_plant(self):
+        await self.assert_uses_index(
+            self.db.get_today_notification_for_plant("ficus", NotificationType.WATER)
+        )
+
+    async def test_notified_plants(self):
+        await self.assert_uses_index(self.db.get_notified_plants(date(2026, 5, 1)))
+
+    async def test_notifications_for_day(self):
+        await self.assert_uses_index(self.db.get_notifications_for_day(date(2026, 5, 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""Квоты и повторы запросов к Google Sheets на листе в памяти (FakeWorksheet)."""
+
+import time
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from gspread.exceptions import APIError
+
+from bot.config import settings
+from bot.database.repository import db
+from bot.services.rate_limit import TokenBucket
+from bot.services.sheets import GoogleSheetsService
+from bot.services.sheets_client import SheetsApiClient
+from bot.services.sheets_fake import FakeWorksheet
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_paces_requests_after_burst(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        elapsed = time.monotonic() - started
+
+        # Два токена сразу, ещё четыре — по 1/20 с
+        self.assertGreaterEqual(elapsed, 4 / 20 * 0.9)
+        self.assertLess(elapsed, 1.0)
+
+    async def test_pause_delays_next_token(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(0.2)
+
+        started = time.monotonic()
+        await bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.2 * 0.9)
+
+
+class SheetsApiClientTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch.multiple(
+            settings,
+            sheets_requests_per_minute=6000,
+            sheets_burst=100,
+            sheets_api_retries=3,
+            sheets_api_backoff_seconds=0.02,
+            sheets_api_max_backoff_seconds=0.1,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = SheetsApiClient()
+        self.addCleanup(self.client.shutdown)
+        self.worksheet = FakeWorksheet()
+
+    async def test_retries_server_error_with_backoff(self):
+        self.worksheet.fail_next(503, 503)
+
+        await self.client.call(self.worksheet.update_cell, 1, 1, "x")
+
+        self.assertEqual(self.worksheet.cells, {(1, 1): "x"})
+        self.assertEqual(self.worksheet.rejected, 2)
+        self.assertEqual(self.client.retries, 2)
+        self.assertEqual(self.client.failures, 0)
+        # Задержки: половина экспоненты + случайная часть, 0.01+ и 0.02+
+        self.assertGreaterEqual(self.client.backoff_seconds, 0.03)
+
+    async def test_quota_error_pauses_bucket(self):
+        self.worksheet.fail_next(429)
+
+        await self.client.call(self.worksheet.update_cell, 1, 1, "x")
+
+        self.assertEqual(self.client.retries, 1)
+        # После 429 ждёт ведро (и все остальные запросы), а не отдельный sleep
+        self.assertEqual(self.client.backoff_seconds, 0)
+        self.assertGreaterEqual(self.client.throttled_seconds, 0.01)
+
+    async def test_gives_up_after_retries(self):
+        self.worksheet.fail_next(503, 503, 503, 503)
+
+        with self.assertRaises(APIError):
+            await self.client.call(self.worksheet.update_cell, 1, 1, "x")
+
+        self.assertEqual(self.client.requests, 4)
+        self.assertEqual(self.client.retries, 3)
+        self.assertEqual(self.client.failures, 1)
+        self.assertEqual(self.worksheet.cells, {})
+
+    async def test_does_not_retry_client_error(self):
+        self.worksheet.fail_next(400)
+
+        with self.assertRaises(APIError):
+            await self.client.call(self.worksheet.update_cell, 1, 1, "x")
+
+        self.assertEqual(self.client.requests, 1)
+        self.assertEqual(self.client.retries, 0)
+
+    async def test_stays_within_quota(self):
+        with patch.multiple(settings, sheets_requests_per_minute=600, sheets_burst=1):
+            client = SheetsApiClient()
+        self.addCleanup(client.shutdown)
+
+        started = time.monotonic()
+        for col in range(1, 5):
+            await client.call(self.worksheet.update_cell, 1, col, "x")
+        elapsed = time.monotonic() - started
+
+        # 600 запросов в минуту = 10 в секунду: первый сразу, ещё три — по 0.1 с
+        self.assertGreaterEqual(elapsed, 0.3 * 0.9)
+        self.assertEqual(self.worksheet.requests, 4)
+
+
+class SheetsFlushTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = patch.multiple(
+            settings,
+            google_sheets_enabled=True,
+            google_sheets_fake=True,
+            sheets_requests_per_minute=6000,
+            sheets_burst=100,
+            sheets_flush_batch_size=500,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(db, "db_path", ":memory:")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        await db.init()
+        self.service = GoogleSheetsService()
+        await self.service.init()
+        self.worksheet = self.service._worksheet
+
+    async def asyncTearDown(self):
+        self.service._api.shutdown()
+        await db.close()
+
+    async def test_one_values_and_one_format_request_per_flush(self):
+        # Подключение: заголовок листа и чтение листа в зеркало
+        self.assertEqual(self.worksheet.requests, 2)
+
+        async with self.service.batch():
+            for name in ("Фикус", "Калатея", "Орхидея"):
+                await self.service.mark_sent(name)
+                await self.service.mark_scheduled(name, date.today())
+
+        written = await self.service.flush()
+
+        self.assertEqual(written, 3)
+        self.assertEqual(self.worksheet.requests, 4)
+        self.assertEqual(sum(v == "📨" for v in self.worksheet.cells.values()), 3)
+        self.assertEqual(len(self.worksheet.formats), 3)
+
+        # Журнал пуст — запросов нет
+        self.assertEqual(await self.service.flush(), 0)
+        self.assertEqual(self.worksheet.requests, 4)
+
+    async def test_large_journal_is_written_in_batches(self):
+        names = [f"Растение {i}" for i in range(5)]
+        async with self.service.batch():
+            for name in names:
+                await self.service.mark_answered(name, "✅")
+
+        with patch.object(settings, "sheets_flush_batch_size", 2):
+            written = await self.service.flush()
+
+        # Пакеты по 2 ячейки: 2 + 2 + 1, в каждом — значения и цвета
+        self.assertEqual(written, 5)
+        self.assertEqual(self.worksheet.requests, 2 + 3 * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()